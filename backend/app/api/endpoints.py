@@ -1,5 +1,8 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import List, Dict
+import bisect
+import math
 import time
 from datetime import datetime
 
@@ -8,10 +11,11 @@ from models.article import (
     ArticleGenerationRequest, ArticleGenerationResponse,
     SEOAnalysisRequest, SEOAnalysisResponse, SEOContent,
     HeadingsGenerationRequest, HeadingsGenerationResponse,
-    H2ContentRequest, H2ContentResponse
+    H2ContentRequest, H2ContentResponse,
+    H2SectionsRequest, H2SectionsResponse
 )
-from services.paraphraser import paraphrasing_service
-from services.article_generator import article_generator_service
+from services.paraphraser import get_service as get_paraphrasing_service
+from services.article_generator import article_generator_service, calculate_keyword_density, split_sentences
 
 router = APIRouter()
 
@@ -21,7 +25,7 @@ async def paraphrase_text(request: ParaphraseRequest):
     Paraphrase given text with specified parameters
     """
     try:
-        variations, confidence_scores, processing_time = await paraphrasing_service.paraphrase_text(request)
+        variations, confidence_scores, processing_time = await get_paraphrasing_service().paraphrase_text(request)
 
         return ParaphraseResponse(
             original_text=request.text,
@@ -32,13 +36,14 @@ async def paraphrase_text(request: ParaphraseRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Paraphrasing failed: {str(e)}")
 
-@router.post("/generate-article", response_model=ArticleGenerationResponse)
+# Hot path: the response is built as a plain dict and serialized directly, skipping a second
+# pydantic validation pass. The model is kept for the OpenAPI schema only.
+@router.post("/generate-article", responses={200: {"model": ArticleGenerationResponse}})
 async def generate_article(request: ArticleGenerationRequest):
     """
     Generate SEO-optimized article with optional paraphrasing
     """
     try:
-        print(f"Received request: {request}")
         article_content, metadata, processing_time = await article_generator_service.generate_article(request)
 
         # Generate variations if requested
@@ -51,55 +56,55 @@ async def generate_article(request: ArticleGenerationRequest):
                 diversity=request.paraphrase_config.diversity,
                 max_variations=request.paraphrase_config.max_variations - 1
             )
-            variations, _, _ = await paraphrasing_service.paraphrase_text(paraphrase_request)
+            variations, _, _ = await get_paraphrasing_service().paraphrase_text(paraphrase_request)
 
         # Extract SEO content if available
         seo_content = None
         if "seo_content" in metadata:
             seo_data = metadata["seo_content"]
-            seo_content = SEOContent(
-                h1_heading=seo_data["h1_heading"],
-                h2_headings=seo_data["h2_headings"],
-                meta_description=metadata["meta_description"],  # Use the generated meta description
-                slug=seo_data["slug"]
-            )
-
-        return ArticleGenerationResponse(
-            topic=request.topic,
-            generated_article=article_content,
-            word_count=metadata["word_count"],
-            keyword_density=metadata["keyword_density"],
-            meta_description=metadata["meta_description"],
-            readability_score=metadata["readability_score"],
-            variations=variations,
-            processing_time=processing_time,
-            created_at=datetime.now(),
-            seo_content=seo_content
-        )
+            seo_content = {
+                "h1_heading": seo_data["h1_heading"],
+                "h2_headings": seo_data["h2_headings"],
+                "meta_description": metadata["meta_description"],  # Use the generated meta description
+                "slug": seo_data["slug"]
+            }
+
+        return ORJSONResponse({
+            "topic": request.topic,
+            "generated_article": article_content,
+            "word_count": metadata["word_count"],
+            "keyword_density": metadata["keyword_density"],
+            "meta_description": metadata["meta_description"],
+            "readability_score": metadata["readability_score"],
+            "variations": variations,
+            "processing_time": processing_time,
+            "created_at": datetime.now(),
+            "seo_content": seo_content
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Article generation failed: {str(e)}")
 
 @router.post("/seo-analysis", response_model=SEOAnalysisResponse)
-async def analyze_seo(request: SEOAnalysisRequest):
+def analyze_seo(request: SEOAnalysisRequest):
     """
     Analyze SEO metrics for given text
+
+    Declared sync on purpose: the work is CPU-bound, so FastAPI runs it in the threadpool
+    instead of blocking the event loop
     """
     try:
-        word_count = len(request.article_text.split())
+        words = request.article_text.split()
+        word_count = len(words)
 
         # Calculate keyword density
-        keyword_density = {}
-        for keyword in request.target_keywords:
-            import re
-            keyword_count = len(re.findall(re.escape(keyword), request.article_text, re.IGNORECASE))
-            keyword_density[keyword] = round((keyword_count / word_count) * 100, 2) if word_count > 0 else 0
+        keyword_density = calculate_keyword_density(request.article_text, request.target_keywords, word_count)
 
         # Calculate readability score
-        readability_score = article_generator_service._calculate_readability_score(request.article_text)
+        readability_score = article_generator_service._calculate_readability_score(request.article_text, words)
 
         # Generate meta description suggestions
         meta_description_suggestions = []
-        sentences = request.article_text.split('. ')
+        sentences = split_sentences(request.article_text)
         for i, sentence in enumerate(sentences[:3]):
             if sentence.strip():
                 suggestion = sentence.strip()
@@ -124,37 +129,27 @@ async def analyze_seo(request: SEOAnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"SEO analysis failed: {str(e)}")
 
+# Score bands as sorted interval tables. Upper bounds are inclusive, so they are nudged to the
+# next float up: bisect_right(thresholds, x) then lands in the same band as the original checks.
+_WC_THRESH = [200, 300, math.nextafter(1000, math.inf), math.nextafter(1500, math.inf)]
+_WC_SCORES = [10, 20, 30, 20, 10]                 # optimal: 300-1000 words
+_DENSITY_THRESH = [0.5, 1.0, math.nextafter(3.0, math.inf), math.nextafter(5.0, math.inf)]
+_DENSITY_SCORES = [15, 25, 40, 25, 15]            # optimal: 1-3%
+_NO_DENSITY_SCORE = 10
+_READABILITY_THRESH = [40, 60, math.nextafter(80, math.inf), math.nextafter(90, math.inf)]
+_READABILITY_SCORES = [10, 20, 30, 20, 10]        # optimal: 60-80
+
 def _calculate_seo_score(word_count: int, keyword_density: Dict[str, float], readability_score: float) -> float:
     """Calculate overall SEO score (0-100)"""
-    score = 0.0
+    score = float(_WC_SCORES[bisect.bisect_right(_WC_THRESH, word_count)])
 
-    # Word count scoring (optimal: 300-1000 words)
-    if 300 <= word_count <= 1000:
-        score += 30
-    elif 200 <= word_count < 300 or 1000 < word_count <= 1500:
-        score += 20
-    else:
-        score += 10
-
-    # Keyword density scoring (optimal: 1-3%)
     if keyword_density:
         avg_density = sum(keyword_density.values()) / len(keyword_density)
-        if 1.0 <= avg_density <= 3.0:
-            score += 40
-        elif 0.5 <= avg_density < 1.0 or 3.0 < avg_density <= 5.0:
-            score += 25
-        else:
-            score += 15
+        score += _DENSITY_SCORES[bisect.bisect_right(_DENSITY_THRESH, avg_density)]
     else:
-        score += 10
+        score += _NO_DENSITY_SCORE
 
-    # Readability scoring (optimal: 60-80)
-    if 60 <= readability_score <= 80:
-        score += 30
-    elif 40 <= readability_score < 60 or 80 < readability_score <= 90:
-        score += 20
-    else:
-        score += 10
+    score += _READABILITY_SCORES[bisect.bisect_right(_READABILITY_THRESH, readability_score)]
 
     return round(min(100.0, score), 1)
 
@@ -255,4 +250,44 @@ async def generate_h2_content(request: H2ContentRequest):
             created_at=datetime.now()
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"H2 content generation failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"H2 content generation failed: {str(e)}")
+
+@router.post("/generate-h2-sections", response_model=H2SectionsResponse)
+async def generate_h2_sections(request: H2SectionsRequest):
+    """
+    Generate content for every H2 heading concurrently
+
+    Sections are generated independently from the SEO outline, without previous-section context
+    """
+    try:
+        article_request = ArticleGenerationRequest(
+            topic=request.topic,
+            keywords=request.keywords,
+            tone=request.tone,
+            include_paraphrasing=False,  # Sections are returned as generated
+            target_length=500  # Default length for compatibility
+        )
+
+        sections, processing_time = await article_generator_service.generate_all_h2_content(
+            article_request,
+            request.seo_content,
+            request.max_concurrency
+        )
+
+        created_at = datetime.now()
+        return H2SectionsResponse(
+            sections=[
+                H2ContentResponse(
+                    h2_heading=h2_heading,
+                    generated_content=content,
+                    word_count=len(content.split()),
+                    processing_time=section_time,
+                    created_at=created_at
+                )
+                for h2_heading, (content, section_time) in zip(request.seo_content.h2_headings, sections)
+            ],
+            processing_time=processing_time,
+            created_at=created_at
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"H2 sections generation failed: {str(e)}")
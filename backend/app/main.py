@@ -1,21 +1,28 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
 import uvicorn
+import logging
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Configure logging before the services are imported (INFO in development, WARNING otherwise)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO" if os.getenv("DEV") else "WARNING").upper())
+
 from api.endpoints import router as api_router
+from services.article_generator import article_generator_service, close_http_client
+from services.seo_content_generator import seo_content_generator
 
 app = FastAPI(
     title="SEO Article Generation API",
     description="API for generating SEO-optimized articles with paraphrasing capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -30,11 +37,21 @@ app.add_middleware(
 # Include API routes
 app.include_router(api_router, prefix="/api", tags=["articles"])
 
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    await close_http_client()
+    await seo_content_generator.aclose()
+
+@app.on_event("shutdown")
+def persist_semantic_cache():
+    if article_generator_service.semantic_cache is not None:
+        article_generator_service.semantic_cache.save()
+
 # Exception handler for validation errors
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     print(f"Validation error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "detail": exc.errors(),
@@ -46,7 +63,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(ValidationError)
 async def validation_error_handler(request: Request, exc: ValidationError):
     print(f"Pydantic validation error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "detail": exc.errors(),
@@ -67,4 +84,16 @@ async def test_endpoint():
     return {"message": "Backend is working correctly!"}
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if os.getenv("DEV"):
+        # Auto-reload only works with a single worker
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+            loop="uvloop",
+            http="httptools",
+            reload=False
+        )
\ No newline at end of file
@@ -22,6 +22,7 @@ class ArticleGenerationRequest(BaseModel):
     tone: str = Field(default="professional", description="Writing tone (professional, casual, formal)")
     include_paraphrasing: bool = Field(default=True, description="Whether to apply paraphrasing")
     paraphrase_config: Optional[ParaphraseRequest] = Field(default=None, description="Paraphrasing configuration")
+    seed: Optional[int] = Field(default=None, description="Random seed for reproducible template-based output")
 
 class SEOContent(BaseModel):
     h1_heading: str = Field(..., description="Main H1 heading")
@@ -78,4 +79,16 @@ class H2ContentResponse(BaseModel):
     generated_content: str
     word_count: int
     processing_time: float
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class H2SectionsRequest(BaseModel):
+    topic: str = Field(..., min_length=5, description="Article topic or main keyword")
+    keywords: List[str] = Field(default=[], description="Target keywords to include")
+    tone: str = Field(default="professional", description="Writing tone (professional, casual, formal)")
+    seo_content: SEOContent = Field(..., description="SEO content with headings")
+    max_concurrency: int = Field(default=8, ge=1, le=16, description="Maximum number of sections generated in parallel")
+
+class H2SectionsResponse(BaseModel):
+    sections: List[H2ContentResponse]
+    processing_time: float
+    created_at: datetime
@@ -1,24 +1,243 @@
+import asyncio
+import hashlib
+import heapq
+import os
 import time
 import random
 import re
+import sqlite3
 import httpx
+import orjson
+import aiofiles
+import diskcache
 import logging
-from typing import List, Dict, Tuple
+from collections import Counter
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from async_lru import alru_cache
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional, Tuple
 from models.article import ArticleGenerationRequest, ParaphraseRequest
-from services.paraphraser import paraphrasing_service
 from services.seo_content_generator import seo_content_generator, SEOContent
+from services.endpoint_pool import Endpoint, EndpointPool
+from services.semantic_cache import get_shared_cache
+from services.jit import njit
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sentence boundaries: whitespace following terminal punctuation
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+# Same boundaries without crossing line breaks, so rewritten articles keep their markdown layout
+_INLINE_SENT_SPLIT = re.compile(r'(?<=[.!?])[^\S\n]+')
+
+# Word tokens for keyword matching
+_TOKEN_RE = re.compile(r"\w+")
+
+
+# Shared client so Nano-GPT connections (TCP + TLS) are pooled across requests. Its connections
+# belong to the event loop that opened them, so it is created lazily for the running loop.
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+_HTTP_CLIENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Shared client for the running event loop"""
+    global _HTTP_CLIENT, _HTTP_CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed or _HTTP_CLIENT_LOOP is not loop:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_connections=1000, max_keepalive_connections=200)
+        )
+        _HTTP_CLIENT_LOOP = loop
+    return _HTTP_CLIENT
+
+
+@lru_cache(maxsize=4096)
+def _kw_regex(keyword: str) -> re.Pattern:
+    """Return a cached case-insensitive pattern matching the keyword literally"""
+    return re.compile(re.escape(keyword), re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def _kw_lower(keyword: str) -> str:
+    """Return the cached lowercase form of a keyword"""
+    return keyword.lower()
+
+
+def _keyword_density(text_lower: str, word_count: int, keywords: List[str]) -> Dict[str, float]:
+    """Calculate keyword density against an already lowercased text"""
+    density = {}
+    token_counts = None
+
+    for keyword in keywords:
+        keyword_lower = _kw_lower(keyword)
+        if _TOKEN_RE.fullmatch(keyword_lower):
+            # Single-word keyword: look it up in a token histogram built once per text
+            if token_counts is None:
+                token_counts = Counter(_TOKEN_RE.findall(text_lower))
+            keyword_count = token_counts[keyword_lower]
+        elif keyword.isascii():
+            # Multi-word phrase: plain substring count equals a case-insensitive literal match for ASCII
+            keyword_count = text_lower.count(keyword_lower)
+        else:
+            # Unicode case folding can differ from str.lower(), keep regex semantics
+            keyword_count = len(_kw_regex(keyword).findall(text_lower))
+        density[keyword] = round(
+            (keyword_count / word_count) * 100, 2) if word_count > 0 else 0
+
+    return density
+
+
+def calculate_keyword_density(text: str, keywords: List[str], word_count: int) -> Dict[str, float]:
+    """
+    Percentage of the text's words taken up by each keyword
+
+    Args:
+        text: Text to analyze (any case)
+        keywords: Keywords or phrases to count, matched case-insensitively
+        word_count: Number of words in text
+
+    Returns:
+        Density per keyword, rounded to two decimals
+    """
+    return _keyword_density(text.lower(), word_count, keywords)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text after sentence-ending punctuation (. ! ?)"""
+    return _SENT_SPLIT.split(text)
+
+
+# Upstream statuses worth retrying (rate limiting and transient server errors)
+_RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class NanoGPTAPIError(Exception):
+    """Non-200 response from the Nano-GPT API"""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"API request failed with status {status_code}: {body}")
+        self.status_code = status_code
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry network errors and rate-limit / 5xx responses, nothing else"""
+    if isinstance(exc, NanoGPTAPIError):
+        return exc.status_code in _RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.HTTPError)
+
+
+# Cached LLM completions expire after a week
+_CACHE_TTL = 7 * 24 * 3600
+
+
+def _cache_key(payload: Dict) -> str:
+    """Stable hash of a canonicalized chat completion payload"""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+@dataclass
+class TokenizedArticle:
+    """Article text with its word split (and, on first use, its sentence split) computed once"""
+    text: str
+    words: Optional[List[str]] = None
+    from_templates: bool = False
+
+    def __post_init__(self):
+        if self.words is None:
+            self.words = self.text.split()
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        return [s.strip() for s in _INLINE_SENT_SPLIT.split(self.text) if s.strip()]
+
+
+def _batch_key(request: ArticleGenerationRequest) -> str:
+    """Checkpoint key of a bulk generation request"""
+    return hashlib.sha256(
+        f"{request.topic}|{','.join(sorted(request.keywords))}|{request.tone}|{request.target_length}".encode()
+    ).hexdigest()
+
+
+_TONE_INSTRUCTIONS: Mapping[str, str] = MappingProxyType({
+    "professional": "Write in a professional, formal tone suitable for business audiences.",
+    "casual": "Write in a casual, conversational tone that's friendly and accessible.",
+    "formal": "Write in a very formal, academic tone with proper structure and language."
+})
+
+_SYS_PROMPT_ARTICLE = "You are an expert SEO content writer who creates high-quality, engaging articles that rank well on search engines."
+_SYS_PROMPT_H2 = "You are an expert SEO content writer who creates high-quality, engaging sections that flow naturally and provide value to readers."
+
+# Opening sentences for template-generated H2 sections, keyed by a word the heading contains.
+# Keys are checked in this order.
+_H2_TEMPLATES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "what": (
+        "{h2_heading} refers to the fundamental concepts and principles that form the foundation of modern {topic} strategies.",
+        "Understanding {h2_heading} is essential for anyone looking to implement effective {topic} solutions.",
+        "The core aspects of {h2_heading} include various methodologies and approaches that have proven successful in recent years."
+    ),
+    "why": (
+        "{h2_heading} plays a crucial role in achieving success with {topic} initiatives.",
+        "The importance of {h2_heading} cannot be overstated when implementing comprehensive {topic} strategies.",
+        "Organizations that prioritize {h2_heading} typically see significant improvements in their overall {topic} performance."
+    ),
+    "how": (
+        "Implementing {h2_heading} requires careful planning and strategic execution.",
+        "The process of {h2_heading} involves several key steps that must be followed systematically.",
+        "Successfully {how_subject} demands attention to detail and adherence to best practices."
+    ),
+    "benefits": (
+        "{h2_heading} offers numerous advantages for organizations seeking to optimize their {topic} efforts.",
+        "The positive impact of {h2_heading} extends across multiple areas of business operations.",
+        "Organizations that leverage {h2_heading} report significant improvements in efficiency and effectiveness."
+    ),
+    "challenges": (
+        "{h2_heading} presents several obstacles that organizations must overcome to achieve success.",
+        "Common difficulties in {challenge_subject} require strategic thinking and innovative solutions.",
+        "Addressing {h2_heading} proactively helps organizations avoid potential pitfalls and setbacks."
+    )
+})
+
+_ARTICLE_PROMPT_TEMPLATE = """Write an SEO-optimized article about "{topic}" with the following requirements:
+
+- Target word count: {target_length} words
+- Keywords to include: {keywords_str}
+- Tone: {tone}
+- Use proper heading structure (H1, H2, H3)
+- Make it engaging and informative
+- Include practical examples and actionable insights
+- End with a clear conclusion and call to action
+{seo_structure}
+
+Please write a complete, well-structured article following the provided SEO structure."""
+
 
 class ArticleGeneratorService:
     """Service for generating SEO-optimized articles"""
 
     def __init__(self):
         self.api_url = "https://nano-gpt.com/api/v1/chat/completions"
-        self.api_key = None  # API key'ini environment variable'dan alacağız
+        # Read once at startup (main.py loads .env before importing the services)
+        self.api_key = os.getenv("NANO_GPT_API_KEY")
+        # One or more endpoint/key pairs requests are spread across (NANO_GPT_ENDPOINTS_JSON)
+        self.endpoints = EndpointPool.from_env(self.api_url, self.api_key)
+
+        # Persistent cache of LLM completions, keyed by the request payload
+        cache_dir = os.getenv("ARTICLE_CACHE_DIR", "/var/cache/articlegen")
+        try:
+            self.cache = diskcache.Cache(cache_dir)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Disk cache unavailable at %s: %s", cache_dir, e)
+            self.cache = None
+
+        # Opt-in similarity cache: near-duplicate topics reuse an earlier article
+        self.semantic_cache = get_shared_cache()
+
+        # Per-instance generator for the template paths instead of the shared module-level random state
+        self._rng = random.Random()
 
         # Templates for different article sections (fallback olarak kalacak)
         self.introduction_templates = [
@@ -55,21 +274,22 @@ class ArticleGeneratorService:
         )
 
         # Generate article content with SEO structure
-        article_content = await self._generate_article_content(request, seo_content)
+        article = await self._generate_article_content(request, seo_content)
+        article_content = article.text
 
         # Note: Paraphrasing disabled for article generation - only available in editor
 
-        # Calculate metadata
-        word_count = len(article_content.split())
-        keyword_density = self._calculate_keyword_density(
-            article_content, request.keywords)
+        # Calculate metadata off the event loop
+        word_count, keyword_density, readability_score = await asyncio.to_thread(
+            self._calculate_metadata, article, request.keywords)
         processing_time = time.time() - start_time
 
         metadata = {
             "word_count": word_count,
             "keyword_density": keyword_density,
             "meta_description": seo_content.meta_description,
-            "readability_score": self._calculate_readability_score(article_content),
+            "readability_score": readability_score,
+            "template_fallback": article.from_templates,
             "seo_content": {
                 "h1_heading": seo_content.h1_heading,
                 "h2_headings": seo_content.h2_headings,
@@ -120,7 +340,7 @@ class ArticleGeneratorService:
             # Try Nano-GPT API first
             content = await self._generate_h2_content_with_ai(request, seo_content, h2_heading, previous_content)
         except Exception as e:
-            logger.warning(f"AI generation failed for H2 '{h2_heading}': {e}, using templates")
+            logger.warning("AI generation failed for H2 '%s': %s, using templates", h2_heading, e)
             content = self._generate_h2_content_with_templates(h2_heading, request.keywords, request.topic)
 
         # Note: Paraphrasing disabled for H2 content generation - only available in editor
@@ -128,22 +348,112 @@ class ArticleGeneratorService:
         processing_time = time.time() - start_time
         return content, processing_time
 
+    async def generate_all_h2_content(self, request: ArticleGenerationRequest, seo_content: SEOContent,
+                                      max_concurrency: int = 8) -> Tuple[List[Tuple[str, float]], float]:
+        """
+        Generate content for all H2 headings concurrently
+
+        Sections only share the SEO outline (no previous-section context), so they are independent
+        and can be requested in parallel.
+
+        Args:
+            request: ArticleGenerationRequest containing generation parameters
+            seo_content: SEO content with headings
+            max_concurrency: Maximum number of sections generated at the same time
+
+        Returns:
+            Tuple of ([(generated_content, processing_time) per H2 heading], total_processing_time)
+        """
+        start_time = time.time()
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate_section(h2_heading: str) -> Tuple[str, float]:
+            async with semaphore:
+                return await self.generate_h2_content(request, seo_content, h2_heading)
+
+        sections = await asyncio.gather(*(generate_section(h2) for h2 in seo_content.h2_headings))
+
+        processing_time = time.time() - start_time
+        return list(sections), processing_time
+
+    async def generate_articles_batch(self, requests: List[ArticleGenerationRequest], output_jsonl: str,
+                                      max_concurrency: int = 8) -> Tuple[int, float]:
+        """
+        Generate many articles, checkpointing each one to a JSONL file as it completes
+
+        Requests whose (topic, keywords, tone, target_length) key is already in the file are skipped,
+        so an interrupted run can simply be restarted with the same arguments. Articles that fell back
+        to the templates are not checkpointed, so a rerun asks the API for them again.
+
+        Args:
+            requests: Articles to generate
+            output_jsonl: Checkpoint file, appended to (one article per line)
+            max_concurrency: Maximum number of articles generated at once
+
+        Returns:
+            Tuple of (number of articles generated in this run, processing_time)
+        """
+        start_time = time.time()
+
+        done = set()
+        if os.path.exists(output_jsonl):
+            async with aiofiles.open(output_jsonl, "r", encoding="utf-8") as f:
+                async for line in f:
+                    try:
+                        done.add(orjson.loads(line)["key"])
+                    except (ValueError, KeyError):
+                        # Line cut short by a crash; that article is generated again
+                        continue
+
+        pending = {}
+        for request in requests:
+            key = _batch_key(request)
+            if key not in done:
+                pending.setdefault(key, request)
+        logger.info("Batch generation: %d done, %d pending", len(done), len(pending))
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        write_lock = asyncio.Lock()
+
+        async with aiofiles.open(output_jsonl, "a", encoding="utf-8") as f:
+            async def generate_one(key: str, request: ArticleGenerationRequest) -> bool:
+                try:
+                    async with semaphore:
+                        article_content, metadata, article_time = await self.generate_article(request)
+                except Exception as e:
+                    logger.error("Batch generation failed for %r: %s", request.topic, e)
+                    return False
+                if metadata["template_fallback"]:
+                    logger.error("Batch generation fell back to templates for %r, not checkpointing it",
+                                 request.topic)
+                    return False
+
+                record = {
+                    "key": key,
+                    "topic": request.topic,
+                    "keywords": request.keywords,
+                    "generated_article": article_content,
+                    **metadata,
+                    "processing_time": article_time
+                }
+                async with write_lock:
+                    await f.write(orjson.dumps(record).decode() + "\n")
+                    await f.flush()
+                return True
+
+            results = await asyncio.gather(*(generate_one(key, request) for key, request in pending.items()))
+
+        processing_time = time.time() - start_time
+        return sum(results), processing_time
+
     async def _generate_h2_content_with_ai(self, request: ArticleGenerationRequest, seo_content: SEOContent,
                                          h2_heading: str, previous_content: str = "") -> str:
         """Generate H2 content using Nano-GPT API with context"""
-        import os
-        self.api_key = os.getenv("NANO_GPT_API_KEY")
-
-        if not self.api_key:
+        if not self.endpoints:
             logger.error("NANO_GPT_API_KEY not found in environment variables")
             raise Exception("NANO_GPT_API_KEY not found in environment variables")
 
         keywords_str = ", ".join(request.keywords) if request.keywords else request.topic
-        tone_instructions = {
-            "professional": "Write in a professional, formal tone suitable for business audiences.",
-            "casual": "Write in a casual, conversational tone that's friendly and accessible.",
-            "formal": "Write in a very formal, academic tone with proper structure and language."
-        }
 
         # Build context from previous content
         context_section = ""
@@ -169,14 +479,14 @@ Make sure this new section flows naturally from the previous content."""
         else:
             h3_probability = 0.05  # 5% chance for general content
 
-        include_h3_structure = random.random() < h3_probability
+        include_h3_structure = self._rng.random() < h3_probability
 
         # Separate logic for lists - extremely rare usage
         include_list = False
         if include_h3_structure:
             # Only consider lists if H3 structure is included, but with very low probability
             list_probability = 0.1  # 10% chance even when H3 is included
-            include_list = random.random() < list_probability
+            include_list = self._rng.random() < list_probability
 
         h3_instruction = ""
         if include_h3_structure:
@@ -201,7 +511,7 @@ Article context:
 - Main topic: {request.topic}
 - H1 title: {seo_content.h1_heading}
 - Keywords to include: {keywords_str}
-- Tone: {tone_instructions.get(request.tone, "professional")}
+- Tone: {_TONE_INSTRUCTIONS.get(request.tone, _TONE_INSTRUCTIONS["professional"])}
 {context_section}
 {h3_instruction}
 
@@ -221,7 +531,7 @@ Write the content for this section (without the H2 heading itself):"""
             "messages": [
                 {
                     "role": "system",
-                    "content": "You are an expert SEO content writer who creates high-quality, engaging sections that flow naturally and provide value to readers."
+                    "content": _SYS_PROMPT_H2
                 },
                 {
                     "role": "user",
@@ -230,28 +540,30 @@ Write the content for this section (without the H2 heading itself):"""
             ],
             "temperature": 0.7,
             "max_tokens": 800,
-            "stream": False
+            "stream": True
         }
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+        cache_key = _cache_key(payload)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            logger.info(f"Making H2 content request to Nano-GPT API: {self.api_url}")
-            response = await client.post(self.api_url, json=payload, headers=headers)
-
-            if response.status_code != 200:
-                logger.error(f"API request failed with status {response.status_code}: {response.text}")
-                raise Exception(f"API request failed with status {response.status_code}: {response.text}")
+        logger.debug("Making H2 content request to Nano-GPT API for %r", h2_heading)
+        content = (await self._complete(payload)).strip()
+        await self._cache_set(cache_key, content)
+        return content
 
-            data = response.json()
+    async def _cache_get(self, key: str):
+        """Look up a cached completion (None on miss or when the disk cache is unavailable)"""
+        if self.cache is None:
+            return None
+        # diskcache does blocking sqlite I/O, keep it off the event loop
+        return await asyncio.to_thread(self.cache.get, key)
 
-            if "choices" not in data or len(data["choices"]) == 0:
-                raise Exception("Invalid API response format")
-
-            return data["choices"][0]["message"]["content"].strip()
+    async def _cache_set(self, key: str, content: str):
+        """Store a completion in the disk cache"""
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set, key, content, expire=_CACHE_TTL)
 
     def _generate_h2_content_with_templates(self, h2_heading: str, keywords: List[str], topic: str) -> str:
         """Fallback template-based H2 content generation with H3 headings and lists"""
@@ -267,54 +579,27 @@ Write the content for this section (without the H2 heading itself):"""
         else:
             h3_probability = 0.05  # 5% chance for general content
 
-        include_h3_structure = random.random() < h3_probability
+        include_h3_structure = self._rng.random() < h3_probability
 
-        # Template sentences based on H2 content patterns
-        templates = {
-            "what": [
-                f"{h2_heading} refers to the fundamental concepts and principles that form the foundation of modern {topic.lower()} strategies.",
-                f"Understanding {h2_heading} is essential for anyone looking to implement effective {topic.lower()} solutions.",
-                f"The core aspects of {h2_heading} include various methodologies and approaches that have proven successful in recent years."
-            ],
-            "why": [
-                f"{h2_heading} plays a crucial role in achieving success with {topic.lower()} initiatives.",
-                f"The importance of {h2_heading} cannot be overstated when implementing comprehensive {topic.lower()} strategies.",
-                f"Organizations that prioritize {h2_heading} typically see significant improvements in their overall {topic.lower()} performance."
-            ],
-            "how": [
-                f"Implementing {h2_heading} requires careful planning and strategic execution.",
-                f"The process of {h2_heading} involves several key steps that must be followed systematically.",
-                f"Successfully {h2_lower.replace('how to ', '')} demands attention to detail and adherence to best practices."
-            ],
-            "benefits": [
-                f"{h2_heading} offers numerous advantages for organizations seeking to optimize their {topic.lower()} efforts.",
-                f"The positive impact of {h2_heading} extends across multiple areas of business operations.",
-                f"Organizations that leverage {h2_heading} report significant improvements in efficiency and effectiveness."
-            ],
-            "challenges": [
-                f"{h2_heading} presents several obstacles that organizations must overcome to achieve success.",
-                f"Common difficulties in {h2_lower.replace('challenges', '')} require strategic thinking and innovative solutions.",
-                f"Addressing {h2_heading} proactively helps organizations avoid potential pitfalls and setbacks."
-            ]
+        # Select appropriate template based on H2 content (defaults to "how" templates); only the
+        # sentence actually used is formatted
+        selected_templates = _H2_TEMPLATES[next((key for key in _H2_TEMPLATES if key in h2_lower), "how")]
+        template_fields = {
+            "h2_heading": h2_heading,
+            "topic": topic.lower(),
+            "how_subject": h2_lower.replace('how to ', ''),
+            "challenge_subject": h2_lower.replace('challenges', '')
         }
 
-        # Select appropriate template based on H2 content
-        selected_templates = templates.get("how", templates["what"])  # Default to "how" templates
-
-        for key, template_list in templates.items():
-            if key in h2_lower:
-                selected_templates = template_list
-                break
-
         if include_h3_structure:
             # Separate logic for lists in templates - extremely rare
-            include_list_in_template = random.random() < 0.1  # 10% chance for lists
+            include_list_in_template = self._rng.random() < 0.1  # 10% chance for lists
 
             # Generate content with H3 headings (and sometimes lists)
             content_parts = []
 
             # Main opening paragraph
-            content_parts.append(random.choice(selected_templates))
+            content_parts.append(self._rng.choice(selected_templates).format(**template_fields))
 
             # Add H3 heading
             if "how" in h2_lower or "steps" in h2_lower or "process" in h2_lower:
@@ -383,7 +668,7 @@ Write the content for this section (without the H2 heading itself):"""
             return "\n\n".join(content_parts)
         else:
             # Build simple paragraph without H3 structure
-            sentences = [random.choice(selected_templates)]
+            sentences = [self._rng.choice(selected_templates).format(**template_fields)]
 
             # Add keyword mentions naturally
             if keywords:
@@ -399,70 +684,115 @@ Write the content for this section (without the H2 heading itself):"""
 
             return " ".join(sentences[:4])  # Limit to 4 sentences for concise H2 sections
 
-    async def _generate_article_content(self, request: ArticleGenerationRequest, seo_content: SEOContent = None) -> str:
+    async def _generate_article_content(self, request: ArticleGenerationRequest,
+                                        seo_content: SEOContent = None) -> TokenizedArticle:
         """Generate article content based on request parameters"""
         # Try Nano-GPT API first
         try:
-            logger.info(
-                f"Attempting to generate article using Nano-GPT API for topic: {request.topic}")
+            logger.debug(
+                "Attempting to generate article using Nano-GPT API for topic: %s", request.topic)
             return await self._generate_with_nano_gpt(request, seo_content)
         except Exception as e:
-            logger.warning(
-                f"Nano-GPT API failed: {e}, falling back to templates")
             # If API fails, use template system
-            logger.info(
-                f"Using template-based generation for topic: {request.topic}")
-            return self._generate_with_templates(request, seo_content)
+            logger.warning(
+                "Nano-GPT API failed: %s, falling back to templates for topic: %s", e, request.topic)
+            article = self._generate_with_templates(request, seo_content)
+            article.from_templates = True
+            return article
 
-    async def _generate_with_nano_gpt(self, request: ArticleGenerationRequest, seo_content: SEOContent = None) -> str:
-        """Generate article using Nano-GPT API"""
-        import os
-        self.api_key = os.getenv("NANO_GPT_API_KEY")
+    async def _generate_with_nano_gpt(self, request: ArticleGenerationRequest, seo_content: SEOContent = None,
+                                      nocache: bool = False) -> TokenizedArticle:
+        """
+        Generate article using Nano-GPT API
 
-        if not self.api_key:
+        Identical requests are served from an in-memory LRU cache, and near-duplicate topics from the
+        semantic cache when it is enabled; pass nocache=True to always ask the model for a fresh article.
+        """
+        if not self.endpoints:
             logger.error("NANO_GPT_API_KEY not found in environment variables")
             raise Exception(
                 "NANO_GPT_API_KEY not found in environment variables")
 
-        keywords_str = ", ".join(
-            request.keywords) if request.keywords else request.topic
-        tone_instructions = {
-            "professional": "Write in a professional, formal tone suitable for business audiences.",
-            "casual": "Write in a casual, conversational tone that's friendly and accessible.",
-            "formal": "Write in a very formal, academic tone with proper structure and language."
-        }
+        # Normalize the request into hashable cache key parts
+        key = (
+            request.topic,
+            request.target_length,
+            tuple(sorted(request.keywords)),
+            request.tone,
+            seo_content.h1_heading if seo_content else None,
+            tuple(seo_content.h2_headings) if seo_content else None
+        )
+        article_content = None
+        semantic_key = None
+        if self.semantic_cache is not None and not nocache:
+            # Only articles written for the same headings are interchangeable
+            semantic_key = (
+                (request.tone, request.target_length) + key[4:],
+                f"{request.topic} | {', '.join(sorted(request.keywords))}".strip().lower()
+            )
+            article_content = await self.semantic_cache.get(*semantic_key)
+
+        if article_content is None:
+            if nocache:
+                article_content = await self._request_article(*key, nocache=True)
+            else:
+                article_content = await self._cached_llm(*key)
+            if semantic_key is not None:
+                await self.semantic_cache.set(*semantic_key, article_content)
+
+        # Post-process to ensure it meets length requirements. Most responses already land within
+        # tolerance (or a few dozen words off), in which case the fixup passes are skipped entirely.
+        article = TokenizedArticle(article_content)
+        word_count = len(article.words)
+        if abs(word_count - request.target_length) < 50:
+            return article
+        if word_count < request.target_length * 0.8:  # If too short
+            article = self._expand_article(
+                article, request.target_length - word_count, self._rng_for(request))
+        elif word_count > request.target_length * 1.2:  # If too long
+            article = self._condense_article(
+                article, word_count - request.target_length)
+
+        return article
+
+    @alru_cache(maxsize=512)
+    async def _cached_llm(self, topic: str, target_length: int, keywords: Tuple[str, ...], tone: str,
+                          h1_heading: str = None, h2_headings: Tuple[str, ...] = None) -> str:
+        """LRU-cached _request_article (failed requests are not cached)"""
+        return await self._request_article(topic, target_length, keywords, tone, h1_heading, h2_headings)
+
+    async def _request_article(self, topic: str, target_length: int, keywords: Tuple[str, ...], tone: str,
+                               h1_heading: str = None, h2_headings: Tuple[str, ...] = None,
+                               nocache: bool = False) -> str:
+        """Build the article prompt and fetch the raw article text from Nano-GPT (nocache skips the disk cache)"""
+        keywords_str = ", ".join(keywords) if keywords else topic
 
         # Build SEO structure if available
         seo_structure = ""
-        if seo_content:
-            h2_list = "\n".join([f"- {h2}" for h2 in seo_content.h2_headings])
+        if h1_heading is not None:
+            h2_list = "\n".join([f"- {h2}" for h2 in h2_headings])
             seo_structure = f"""
 
 Use this structure:
-H1: {seo_content.h1_heading}
+H1: {h1_heading}
 
 H2 Headings to cover:
 {h2_list}"""
 
-        prompt = f"""Write an SEO-optimized article about "{request.topic}" with the following requirements:
-
-- Target word count: {request.target_length} words
-- Keywords to include: {keywords_str}
-- Tone: {tone_instructions.get(request.tone, "professional")}
-- Use proper heading structure (H1, H2, H3)
-- Make it engaging and informative
-- Include practical examples and actionable insights
-- End with a clear conclusion and call to action
-{seo_structure}
-
-Please write a complete, well-structured article following the provided SEO structure."""
+        prompt = _ARTICLE_PROMPT_TEMPLATE.format(
+            topic=topic,
+            target_length=target_length,
+            keywords_str=keywords_str,
+            tone=_TONE_INSTRUCTIONS.get(tone, _TONE_INSTRUCTIONS["professional"]),
+            seo_structure=seo_structure
+        )
 
         payload = {
             "model": "deepseek-ai/deepseek-v3.2-exp",
             "messages": [
                 {
                     "role": "system",
-                    "content": "You are an expert SEO content writer who creates high-quality, engaging articles that rank well on search engines."
+                    "content": _SYS_PROMPT_ARTICLE
                 },
                 {
                     "role": "user",
@@ -471,48 +801,118 @@ Please write a complete, well-structured article following the provided SEO stru
             ],
             "temperature": 0.7,
             # Rough estimate
-            "max_tokens": min(request.target_length * 2, 4000),
-            "stream": False
+            "max_tokens": min(target_length * 2, 4000),
+            "stream": True
         }
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            logger.info(f"Making request to Nano-GPT API: {self.api_url}")
-            response = await client.post(self.api_url, json=payload, headers=headers)
-
-            if response.status_code != 200:
-                logger.error(
-                    f"API request failed with status {response.status_code}: {response.text}")
-                raise Exception(
-                    f"API request failed with status {response.status_code}: {response.text}")
-
-            data = response.json()
-
-            if "choices" not in data or len(data["choices"]) == 0:
-                raise Exception("Invalid API response format")
+        cache_key = _cache_key(payload)
+        if not nocache:
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Stop reading the stream once the article is comfortably past the target length
+        max_words = int(target_length * 1.1)
+        logger.debug("Making article request to Nano-GPT API for %r", topic)
+        content = await self._complete(payload, max_words)
+        if not nocache:
+            await self._cache_set(cache_key, content)
+        return content
+
+    async def _complete(self, payload: Dict, max_words: int = None) -> str:
+        """
+        Run a completion on the least busy endpoint, failing over to the others
 
-            article_content = data["choices"][0]["message"]["content"]
+        Each endpoint gets its own retries first; only a retryable error that survives them moves
+        the request to the next endpoint.
+        """
+        tried = []
+        while True:
+            endpoint = self.endpoints.pick(exclude=tried)
+            try:
+                async with endpoint.slot():
+                    return await self._stream_completion(_get_http_client(), endpoint, payload, max_words)
+            except Exception as e:
+                tried.append(endpoint)
+                if not _is_retryable(e) or len(tried) == len(self.endpoints):
+                    raise
+                logger.warning("Endpoint %s failed (%s), failing over", endpoint.url, e)
+
+    @retry(
+        stop=stop_after_attempt(4),
+        wait=wait_random_exponential(multiplier=0.5, max=8),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True
+    )
+    async def _stream_completion(self, client: httpx.AsyncClient, endpoint: Endpoint, payload: Dict,
+                                 max_words: int = None) -> str:
+        """
+        Stream a chat completion (SSE) and return the accumulated message content
 
-            # Post-process to ensure it meets length requirements
-            word_count = len(article_content.split())
-            if word_count < request.target_length * 0.8:  # If too short
-                article_content = self._expand_article(
-                    article_content, request.target_length - word_count)
-            elif word_count > request.target_length * 1.2:  # If too long
-                article_content = self._condense_article(
-                    article_content, word_count - request.target_length)
+        Args:
+            client: HTTP client to send the request with
+            payload: Chat completion payload with "stream" enabled
+            endpoint: Endpoint (URL and auth headers) to send it to
+            max_words: Stop reading (and close the stream) once this many words have arrived
 
-            return article_content
+        Returns:
+            The generated content, possibly cut short at max_words
+        """
+        parts = []
+        word_count = 0
+        ends_in_word = False
 
-    def _generate_with_templates(self, request: ArticleGenerationRequest, seo_content: SEOContent = None) -> str:
+        async with client.stream("POST", endpoint.url, content=orjson.dumps(payload), headers=endpoint.headers) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode(errors="replace")
+                logger.error(
+                    "API request failed with status %d: %s", response.status_code, body)
+                raise NanoGPTAPIError(response.status_code, body)
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+
+                choices = orjson.loads(data).get("choices")
+                if not choices:
+                    continue
+                delta = (choices[0].get("delta") or {}).get("content")
+                if not delta:
+                    continue
+
+                parts.append(delta)
+
+                # Count words incrementally; a chunk may continue the previous chunk's last word
+                word_count += len(delta.split())
+                if ends_in_word and not delta[0].isspace():
+                    word_count -= 1
+                ends_in_word = not delta[-1].isspace()
+
+                if max_words and word_count >= max_words:
+                    logger.debug("Reached %d words, closing stream early", word_count)
+                    break
+
+        if not parts:
+            raise Exception("Invalid API response format")
+
+        return "".join(parts)
+
+    def _rng_for(self, request: ArticleGenerationRequest) -> random.Random:
+        """Fresh generator for a seeded request (reproducible output), the shared one otherwise"""
+        if request.seed is not None:
+            return random.Random(request.seed)
+        return self._rng
+
+    def _generate_with_templates(self, request: ArticleGenerationRequest,
+                                 seo_content: SEOContent = None) -> TokenizedArticle:
         """Fallback template-based generation"""
         topic = request.topic
         keywords = request.keywords or [topic]
         target_length = request.target_length
+        rng = self._rng_for(request)
 
         # Select templates - use SEO content if available
         if seo_content:
@@ -520,45 +920,46 @@ Please write a complete, well-structured article following the provided SEO stru
             article_parts = [f"# {seo_content.h1_heading}"]
 
             # Add introduction
-            introduction = random.choice(self.introduction_templates).format(topic=topic)
+            introduction = rng.choice(self.introduction_templates).format(topic=topic)
             article_parts.append(introduction)
 
             # Add H2 sections
             for h2 in seo_content.h2_headings:
                 article_parts.append(f"## {h2}")
                 # Generate content for this H2
-                paragraph = self._generate_paragraph(h2.replace(topic.lower(), topic), keywords)
+                paragraph = self._generate_paragraph(h2.replace(topic.lower(), topic), keywords, rng)
                 article_parts.append(paragraph)
 
             # Add conclusion
-            conclusion = random.choice(self.conclusion_templates).format(topic=topic)
+            conclusion = rng.choice(self.conclusion_templates).format(topic=topic)
             article_parts.append(f"## Conclusion")
             article_parts.append(conclusion)
         else:
             # Fallback to original template structure
-            introduction = random.choice(self.introduction_templates).format(topic=topic)
-            conclusion = random.choice(self.conclusion_templates).format(topic=topic)
+            introduction = rng.choice(self.introduction_templates).format(topic=topic)
+            conclusion = rng.choice(self.conclusion_templates).format(topic=topic)
 
             # Generate body paragraphs
-            body_paragraphs = self._generate_body_paragraphs(topic, keywords, target_length)
+            body_paragraphs = self._generate_body_paragraphs(topic, keywords, target_length, rng)
 
             # Combine sections
             article_parts = [introduction] + body_paragraphs + [conclusion]
 
-        article = "\n\n".join(article_parts)
+        article = TokenizedArticle("\n\n".join(article_parts))
 
         # Adjust length to meet target
-        current_length = len(article.split())
+        current_length = len(article.words)
         if current_length < target_length:
             article = self._expand_article(
-                article, target_length - current_length)
+                article, target_length - current_length, rng)
         elif current_length > target_length:
             article = self._condense_article(
                 article, current_length - target_length)
 
         return article
 
-    def _generate_body_paragraphs(self, topic: str, keywords: List[str], target_length: int) -> List[str]:
+    def _generate_body_paragraphs(self, topic: str, keywords: List[str], target_length: int,
+                                  rng: random.Random) -> List[str]:
         """Generate body paragraphs for the article"""
         num_paragraphs = max(3, target_length //
                              100)  # Approximate number of paragraphs
@@ -573,12 +974,12 @@ Please write a complete, well-structured article following the provided SEO stru
         ]
 
         for i in range(min(num_paragraphs, len(paragraph_topics))):
-            paragraph = self._generate_paragraph(paragraph_topics[i], keywords)
+            paragraph = self._generate_paragraph(paragraph_topics[i], keywords, rng)
             paragraphs.append(paragraph)
 
         return paragraphs
 
-    def _generate_paragraph(self, topic: str, keywords: List[str]) -> str:
+    def _generate_paragraph(self, topic: str, keywords: List[str], rng: random.Random) -> str:
         """Generate a single paragraph"""
         sentences = [
             f"{topic} requires careful consideration of various factors.",
@@ -591,84 +992,113 @@ Please write a complete, well-structured article following the provided SEO stru
         # Add keyword mentions naturally
         if keywords:
             keyword_sentence = f"Keywords such as {', '.join(keywords[:3])} are particularly relevant to this discussion."
-            sentences.insert(random.randint(
+            sentences.insert(rng.randint(
                 1, len(sentences)-1), keyword_sentence)
 
-        return " ".join(sentences[:random.randint(3, 5)])
+        return " ".join(sentences[:rng.randint(3, 5)])
 
-    def _expand_article(self, article: str, additional_words: int) -> str:
+    def _expand_article(self, article: TokenizedArticle, additional_words: int,
+                        rng: random.Random) -> TokenizedArticle:
         """Expand article to meet target length"""
-        sentences = article.split('. ')
-        sentences = [s.strip() for s in sentences if s.strip()]
-
-        # Add additional sentences to meet word count
-        while additional_words > 0 and len(sentences) < 20:
-            expansion_sentences = [
-                "This aspect deserves further attention and consideration.",
-                "It's worth noting that multiple factors contribute to this outcome.",
-                "Research continues to evolve in this area, providing new insights.",
-                "Practical applications of these concepts have shown promising results."
-            ]
-
-            new_sentence = random.choice(expansion_sentences)
-            sentences.insert(random.randint(1, len(sentences)-1), new_sentence)
-            additional_words -= len(new_sentence.split())
+        sentences = article.sentences
 
-        return '. '.join(sentences)
+        expansion_sentences = [
+            "This aspect deserves further attention and consideration.",
+            "It's worth noting that multiple factors contribute to this outcome.",
+            "Research continues to evolve in this area, providing new insights.",
+            "Practical applications of these concepts have shown promising results."
+        ]
 
-    def _condense_article(self, article: str, words_to_remove: int) -> str:
-        """Condense article to meet target length"""
-        sentences = article.split('. ')
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # Draw every additional sentence up front (at most 20 sentences in total)
+        new_sentences = []
+        for new_sentence in rng.choices(expansion_sentences, k=max(0, 20 - len(sentences))):
+            if additional_words <= 0:
+                break
+            new_sentences.append(new_sentence)
+            additional_words -= len(new_sentence.split())
 
-        # Remove less important sentences
-        while words_to_remove > 0 and len(sentences) > 5:
-            # Remove sentences with fewer words first
-            sentences.sort(key=len)
-            removed = sentences.pop(0)
-            words_to_remove -= len(removed.split())
-            # Restore original order
-            sentences.sort(key=lambda x: article.find(x))
+        # ...then their slots in the final article (never before the opening sentence), and merge
+        # originals and additions in one pass instead of repeated list.insert calls
+        total = len(sentences) + len(new_sentences)
+        slots = set(rng.sample(range(1 if sentences else 0, total), len(new_sentences)))
+        originals = iter(sentences)
+        additions = iter(new_sentences)
+        merged = [next(additions) if i in slots else next(originals) for i in range(total)]
 
-        return '. '.join(sentences)
+        return TokenizedArticle(' '.join(merged))
 
-    def _calculate_keyword_density(self, text: str, keywords: List[str]) -> Dict[str, float]:
+    def _condense_article(self, article: TokenizedArticle, words_to_remove: int) -> TokenizedArticle:
+        """Condense article to meet target length"""
+        sentences = article.sentences
+
+        # Remove less important sentences (shortest first), keeping at least 5.
+        # heapify is O(n) and each pop O(log n), so only the removed sentences are ordered.
+        removed = set()
+        max_removals = max(0, len(sentences) - 5)
+        heap = [(len(s), i) for i, s in enumerate(sentences)]
+        heapq.heapify(heap)
+        while words_to_remove > 0 and len(removed) < max_removals:
+            _, index = heapq.heappop(heap)
+            removed.add(index)
+            words_to_remove -= len(sentences[index].split())
+
+        return TokenizedArticle(' '.join(s for i, s in enumerate(sentences) if i not in removed))
+
+    def _calculate_metadata(self, article: TokenizedArticle,
+                            keywords: List[str]) -> Tuple[int, Dict[str, float], float]:
+        """Calculate word count, keyword density and readability from the article's existing word split"""
+        keyword_density = self._calculate_keyword_density(article.text, keywords, article.words)
+        readability_score = self._calculate_readability_score(article.text, article.words)
+        return len(article.words), keyword_density, readability_score
+
+    def _calculate_keyword_density(self, text: str, keywords: List[str],
+                                   words: Optional[List[str]] = None) -> Dict[str, float]:
         """Calculate keyword density in the text"""
-        word_count = len(text.split())
-        density = {}
-
-        for keyword in keywords:
-            keyword_count = len(re.findall(
-                re.escape(keyword), text, re.IGNORECASE))
-            density[keyword] = round(
-                (keyword_count / word_count) * 100, 2) if word_count > 0 else 0
-
-        return density
+        if words is None:
+            words = text.split()
+        return _keyword_density(text.lower(), len(words), keywords)
 
     def _generate_meta_description(self, article: str, topic: str) -> str:
         """Generate meta description from article"""
-        sentences = article.split('. ')
-        # Take first 1-2 sentences and limit to 160 characters
-        meta_desc = sentences[0] if sentences else ""
+        # Take the first sentence and limit to 160 characters. A boundary past character 160
+        # would be truncated anyway, so only the first 161 characters need to be scanned.
+        boundary = _SENT_SPLIT.search(article, 0, 161)
+        meta_desc = article[:boundary.start()] if boundary else article
         if len(meta_desc) > 160:
             meta_desc = meta_desc[:157] + "..."
         return meta_desc
 
-    def _calculate_readability_score(self, text: str) -> float:
+    def _calculate_readability_score(self, text: str, words: Optional[List[str]] = None) -> float:
         """Calculate mock readability score (0-100, higher is better)"""
-        sentences = text.split('. ')
-        words = text.split()
+        if words is None:
+            words = text.split()
 
-        if not sentences or not words:
+        if not words:
             return 0.0
 
-        avg_words_per_sentence = len(words) / len(sentences)
-        avg_chars_per_word = sum(len(word) for word in words) / len(words)
+        # Count sentence terminators in C, without building lists
+        sentence_count = max(1, text.count('.') + text.count('!') + text.count('?'))
+        total_chars = sum(map(len, words))
+        return round(_readability_kernel(len(words), sentence_count, total_chars), 1)
+
+
+@njit(cache=True)
+def _readability_kernel(word_count: int, sentence_count: int, total_chars: int) -> float:
+    """Mock readability formula (simplified Flesch-Kincaid), clamped to 0-100"""
+    avg_words_per_sentence = word_count / sentence_count
+    avg_chars_per_word = total_chars / word_count
+
+    readability = 100 - (1.5 * avg_words_per_sentence) - \
+        (2 * avg_chars_per_word)
+    return max(0.0, min(100.0, readability))
+
 
-        # Mock readability formula (simplified Flesch-Kincaid)
-        readability = 100 - (1.5 * avg_words_per_sentence) - \
-            (2 * avg_chars_per_word)
-        return round(max(0.0, min(100.0, readability)), 1)
+async def close_http_client():
+    """Close the shared Nano-GPT client (called on application shutdown)"""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
 
 
 # Global service instance
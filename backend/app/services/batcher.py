@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBatcher:
+    """Coalesces concurrent submissions into batches handled by a single callback"""
+
+    def __init__(self, process_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 8, max_wait_ms: int = 50):
+        """
+        Args:
+            process_batch: Coroutine receiving a list of items and returning one result per item
+                (an exception instance in place of a result fails only that item)
+            max_batch_size: Maximum number of items dispatched together
+            max_wait_ms: How long to wait for more items once the first one arrives
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its individual result"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def _ensure_worker(self):
+        """Start the collector task on first use (and after it died or the event loop changed)"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # The queue and worker of an earlier loop (e.g. a previous asyncio.run) can't be reused
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = None
+            self._inflight = set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._collect())
+
+    async def _collect(self):
+        """Group queued items into batches and dispatch them without blocking collection"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Run one batch and fan results back out to the waiting callers"""
+        logger.debug("Dispatching batch of %d items", len(batch))
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                # Caller went away (e.g. request cancelled)
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
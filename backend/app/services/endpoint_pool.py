@@ -0,0 +1,78 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class Endpoint:
+    """A single chat completion endpoint with its own key and concurrency limit"""
+
+    def __init__(self, url: str, key: str, concurrency: int = 64):
+        self.url = url
+        self.key = key
+        self.concurrency = concurrency
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}"
+        }
+        self.inflight = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of this endpoint's concurrency slots"""
+        self.inflight += 1
+        try:
+            async with self._semaphore:
+                yield self
+        finally:
+            self.inflight -= 1
+
+
+class EndpointPool:
+    """Load-balances requests across several endpoints / API keys"""
+
+    def __init__(self, endpoints: List[Endpoint]):
+        self.endpoints = endpoints
+        self._rng = random.Random()
+
+    @classmethod
+    def from_env(cls, default_url: str, default_key: Optional[str]) -> "EndpointPool":
+        """
+        Build the pool from NANO_GPT_ENDPOINTS_JSON, or a single default endpoint
+
+        Args:
+            default_url: URL used when no endpoint list is configured (and for entries without one)
+            default_key: API key for the single default endpoint
+
+        Returns:
+            The pool; empty when no API key is configured at all
+        """
+        raw = os.getenv("NANO_GPT_ENDPOINTS_JSON")
+        if not raw:
+            return cls([Endpoint(default_url, default_key)] if default_key else [])
+
+        entries: List[Dict] = json.loads(raw)
+        endpoints = [
+            Endpoint(entry.get("url", default_url), entry["key"], int(entry.get("concurrency", 64)))
+            for entry in entries
+            if entry.get("key")
+        ]
+        logger.info("Configured %d Nano-GPT endpoint(s)", len(endpoints))
+        return cls(endpoints)
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def pick(self, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        """Power-of-two-choices: the less loaded of two random candidates"""
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        if len(candidates) <= 2:
+            return min(candidates, key=lambda endpoint: endpoint.inflight)
+        first, second = self._rng.sample(candidates, 2)
+        return first if first.inflight <= second.inflight else second
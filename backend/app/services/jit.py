@@ -0,0 +1,13 @@
+"""Optional Numba JIT support for the readability kernel (article_generator._readability_kernel)"""
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the kernel runs as plain Python without it
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit supporting both @njit and @njit(...)"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
@@ -1,21 +1,122 @@
+import asyncio
+import hashlib
 import time
 import os
+import re
 import logging
-from typing import List, Tuple, Optional
+import warnings
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional
 from models.article import ParaphraseRequest
+from services.batcher import AsyncBatcher
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fallback synonym table, matched as whole words in a single compiled pattern
+_SYNONYMS = {
+    "good": "excellent", "bad": "poor", "big": "large", "small": "tiny",
+    "fast": "quick", "slow": "gradual", "important": "crucial",
+    "helpful": "beneficial", "effective": "efficient", "new": "recent",
+    "old": "previous", "better": "improved", "best": "optimal"
+}
+_SYNONYM_RE = re.compile(r'\b(' + '|'.join(map(re.escape, _SYNONYMS)) + r')\b', re.IGNORECASE)
+
+
+def _replace_synonym(match: "re.Match") -> str:
+    """Synonym for a matched word, keeping its capitalization ("Good" -> "Excellent")"""
+    word = match.group(0)
+    synonym = _SYNONYMS[word.lower()]
+    if word.isupper() and len(word) > 1:
+        return synonym.upper()
+    if word[0].isupper():
+        return synonym.capitalize()
+    return synonym
+
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+# Fallback split points for sentences too long for one model input
+_CLAUSE_SPLIT = re.compile(r'(?<=[,;:])\s+')
+
+# Chunks per generate() call, bounding peak memory for long articles
+_GENERATE_BATCH_SIZE = 16
+
+# Model input/output length in tokens, and the chunk budget that leaves room for the
+# "paraphrase: " prefix and the end-of-sequence token
+_MAX_LENGTH = 128
+_CHUNK_TOKENS = 120
+
+
+@dataclass(slots=True, frozen=True)
+class _Normalized:
+    """Request parameters mapped to Parrot's generation and filter settings"""
+    adequacy: float
+    fluency: float
+    diversity_ranker: str
+    do_diverse: bool
+    num_variations: int
+
+    @classmethod
+    def from_request(cls, request: ParaphraseRequest) -> "_Normalized":
+        do_diverse = request.diversity > 1.0
+        return cls(
+            adequacy=min(max(request.adequacy / 2.0, 0.5), 1.0),  # Normalize to 0.5-1.0
+            fluency=min(max(request.fluency / 2.0, 0.5), 1.0),    # Normalize to 0.5-1.0
+            diversity_ranker="levenshtein" if do_diverse else "none",
+            do_diverse=do_diverse,
+            num_variations=request.max_variations
+        )
+
+
+def _beam_groups(num_beams: int) -> int:
+    """Smallest divisor of num_beams from 2 to 8, as Parrot picks it (num_beams itself when there is none)"""
+    return next((n for n in range(2, 9) if num_beams % n == 0), num_beams)
+
+
+def _pack_sentences(sentences: List[str], sizes: List[int], max_size: int) -> List[str]:
+    """Group consecutive sentences into chunks of at most max_size (each sentence must fit on its own)"""
+    chunks = []
+    current = []
+    current_size = 0
+    for sentence, size in zip(sentences, sizes):
+        if current and current_size + size > max_size:
+            chunks.append(" ".join(current))
+            current = []
+            current_size = 0
+        current.append(sentence)
+        current_size += size
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
 class ParaphrasingService:
     """Service for text paraphrasing using Parrot T5 model"""
 
     def __init__(self):
         self.parrot = None
+        self._load_lock = asyncio.Lock()
+        # Concurrent paraphrase requests share generate() calls
+        self._model_batcher = AsyncBatcher(self._run_model_batch, max_batch_size=8, max_wait_ms=10)
+        self.tokenizer = None
+        self.model = None
+        self.device = "cpu"
         self.model_loaded = False
         self.use_gpu = os.getenv("USE_GPU", "false").lower() == "true"
         self.model_name = os.getenv("PARROT_MODEL", "prithivida/parrot_paraphraser_on_T5")
+        self.use_onnx = os.getenv("PARROT_ONNX", "false").lower() == "true"
+        self.quantize = os.getenv("PARROT_QUANTIZE", "false").lower() == "true"
+        self.compile_model = os.getenv("PARROT_COMPILE", "false").lower() == "true"
+
+        # LRU cache of model results, keyed by normalized text and parameters
+        self.cache_maxsize = 1024
+        self._cache: "OrderedDict[tuple, Tuple[Tuple[str, ...], Tuple[float, ...]]]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        # Noise source for the fallback confidence scores
+        self._np_rng = np.random.default_rng()
 
         # Initialize fallback immediately, model will be loaded on first use
         self._initialize_fallback()
@@ -23,40 +124,130 @@ class ParaphrasingService:
     def _initialize_model(self):
         """Initialize the Parrot model"""
         try:
-            # Suppress warnings during model loading
-            import warnings
-            warnings.filterwarnings("ignore")
-
             from parrot import Parrot
             import torch
 
-            logger.info(f"Loading Parrot model: {self.model_name}")
-            logger.info(f"Using GPU: {self.use_gpu}")
+            logger.info("Loading Parrot model: %s (GPU: %s)", self.model_name, self.use_gpu)
 
-            # Initialize Parrot with T5 model
-            self.parrot = Parrot(
-                model_tag=self.model_name,
-                use_gpu=self.use_gpu
-            )
+            # Initialize Parrot with T5 model, suppressing warnings during model loading only
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                self.parrot = Parrot(
+                    model_tag=self.model_name,
+                    use_gpu=self.use_gpu
+                )
+
+            # Use the underlying HF tokenizer/model directly so chunks can be batched
+            self.device = "cuda:0" if self.use_gpu and torch.cuda.is_available() else "cpu"
+            self.tokenizer = self.parrot.tokenizer
+            if not getattr(self.tokenizer, "is_fast", False):
+                # Batched, padded tokenization is much cheaper with the Rust backend
+                from transformers import AutoTokenizer
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
+                self.parrot.tokenizer = self.tokenizer
+            self.model = self.parrot.model.to(self.device)
+
+            if self.device != "cpu":
+                # Halve the weight bandwidth per decoder step. Only bf16: T5 activations overflow in fp16.
+                torch.backends.cuda.matmul.allow_tf32 = True
+                if torch.cuda.is_bf16_supported():
+                    self.model = self.model.to(torch.bfloat16)
+                    logger.info("Running Parrot model in bfloat16")
+            elif self.use_onnx:
+                # Optionally swap in an INT8 ONNX Runtime export for CPU inference
+                self.model = self._load_onnx_model() or self.model
+            elif self.quantize:
+                self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+                logger.info("Running Parrot model with dynamic INT8 quantization")
+
+            if self.compile_model and not self.use_onnx and not self.quantize:
+                self._compile_model()
 
             self.model_loaded = True
             logger.info("Parrot model loaded successfully")
 
         except Exception as e:
-            logger.error(f"Failed to load Parrot model: {str(e)}")
+            logger.error("Failed to load Parrot model: %s", e)
             logger.warning("Falling back to mock paraphrasing")
             self.model_loaded = False
             self._initialize_fallback()
 
+    def _compile_model(self):
+        """Compile the T5 forward pass with torch.compile and warm it up on typical input lengths"""
+        import torch
+
+        # generate() calls the model's forward, so compile that rather than wrapping the module
+        eager_forward = self.model.forward
+        mode = "reduce-overhead" if self.device != "cpu" else None
+        self.model.forward = torch.compile(eager_forward, mode=mode, dynamic=True, fullgraph=False)
+
+        try:
+            # Populate the compile cache before serving traffic (about 32, 64 and 128 tokens)
+            for word_count in (30, 60, 120):
+                self._generate_batch([" ".join(["word"] * word_count)], 1, False)
+            logger.info("Compiled Parrot model with torch.compile")
+        except Exception as e:
+            logger.warning("torch.compile warmup failed, using eager mode: %s", e)
+            self.model.forward = eager_forward
+
+    def _load_onnx_model(self):
+        """
+        Export the T5 model to ONNX Runtime with INT8 dynamic quantization
+
+        Uses the encoder / decoder / decoder-with-past layout, so generate() keeps working unchanged.
+        The export is written once to PARROT_ONNX_DIR and reused on later starts.
+
+        Returns:
+            The ONNX Runtime model, or None if optimum is unavailable or the export fails
+        """
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        except ImportError:
+            logger.warning("PARROT_ONNX is set but optimum[onnxruntime] is not installed, using PyTorch")
+            return None
+
+        onnx_dir = os.getenv("PARROT_ONNX_DIR", os.path.join("onnx", self.model_name.replace("/", "--")))
+        quantized_dir = os.path.join(onnx_dir, "quantized")
+        onnx_files = ("encoder_model", "decoder_model", "decoder_with_past_model")
+
+        try:
+            if not os.path.isdir(quantized_dir):
+                logger.info("Exporting %s to ONNX in %s", self.model_name, onnx_dir)
+                ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=True).save_pretrained(onnx_dir)
+
+                quantization_config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+                for name in onnx_files:
+                    quantizer = ORTQuantizer.from_pretrained(onnx_dir, file_name=f"{name}.onnx")
+                    quantizer.quantize(save_dir=quantized_dir, quantization_config=quantization_config)
+
+            session_options = onnxruntime.SessionOptions()
+            session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session_options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+
+            model = ORTModelForSeq2SeqLM.from_pretrained(
+                quantized_dir,
+                encoder_file_name=f"{onnx_files[0]}_quantized.onnx",
+                decoder_file_name=f"{onnx_files[1]}_quantized.onnx",
+                decoder_with_past_file_name=f"{onnx_files[2]}_quantized.onnx",
+                session_options=session_options
+            )
+            logger.info("Using quantized ONNX Runtime model")
+            return model
+        except Exception as e:
+            logger.error("ONNX export failed, using PyTorch: %s", e)
+            return None
+
     def _initialize_fallback(self):
         """Initialize fallback mock paraphraser"""
-        self.fallback_templates = [
+        self.fallback_templates: Tuple[str, ...] = (
             "Another way to say this is: {text}",
             "This can also be expressed as: {text}",
             "Alternatively, we could say: {text}",
             "In other words: {text}",
             "To put it differently: {text}"
-        ]
+        )
 
     async def paraphrase_text(self, request: ParaphraseRequest) -> Tuple[List[str], List[float], float]:
         """
@@ -71,107 +262,245 @@ class ParaphrasingService:
         if not request.text or len(request.text.strip()) < 10:
             return [], [], 0.0
 
-        start_time = time.time()
+        # Only the end-to-end time is measured, including a first-use model load
+        start_time = time.perf_counter()
+        variations, confidence_scores = await self._paraphrase(request)
+        return variations, confidence_scores, time.perf_counter() - start_time
 
+    async def _paraphrase(self, request: ParaphraseRequest) -> Tuple[List[str], List[float]]:
+        """Paraphrase with the model (through the result cache), falling back to templates"""
         try:
-            # Try to load model if not already loaded
+            # Try to load model if not already loaded. Loading takes seconds, so it runs in a worker
+            # thread, and the lock keeps concurrent first requests from loading it several times.
             if not self.model_loaded:
-                logger.info("Loading Parrot model on first use...")
-                self._initialize_model()
+                async with self._load_lock:
+                    if not self.model_loaded:
+                        logger.info("Loading Parrot model on first use...")
+                        await asyncio.to_thread(self._initialize_model)
 
             if self.model_loaded and self.parrot:
-                return await self._paraphrase_with_model(request)
+                cache_key = self._cache_key(request)
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    self._cache_hits += 1
+                    self._cache.move_to_end(cache_key)
+                    variations, confidence_scores = cached
+                    return list(variations), list(confidence_scores)
+
+                self._cache_misses += 1
+                variations, confidence_scores = await self._paraphrase_with_model(request)
+                if variations:
+                    self._cache[cache_key] = (tuple(variations), tuple(confidence_scores))
+                    if len(self._cache) > self.cache_maxsize:
+                        self._cache.popitem(last=False)
+                return variations, confidence_scores
             else:
                 return await self._paraphrase_with_fallback(request)
         except Exception as e:
-            logger.error(f"Error during paraphrasing: {str(e)}")
+            logger.error("Error during paraphrasing: %s", e)
             return await self._paraphrase_with_fallback(request)
 
-    async def _paraphrase_with_model(self, request: ParaphraseRequest) -> Tuple[List[str], List[float], float]:
+    def _cache_key(self, request: ParaphraseRequest) -> tuple:
+        """Normalized text digest plus the generation parameters"""
+        return (
+            hashlib.blake2b(request.text.strip().lower().encode(), digest_size=16).digest(),
+            request.max_variations,
+            round(request.adequacy, 2),
+            round(request.fluency, 2),
+            round(request.diversity, 2)
+        )
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size of the paraphrase result cache"""
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "hit_rate": self._cache_hits / lookups if lookups else 0.0,
+            "size": len(self._cache),
+            "maxsize": self.cache_maxsize
+        }
+
+    async def _paraphrase_with_model(self, request: ParaphraseRequest) -> Tuple[List[str], List[float]]:
         """Paraphrase using the actual Parrot model"""
         variations = []
         confidence_scores = []
-        start_time = time.time()
 
         try:
-            # Map frontend parameters to Parrot's parameters
-            adequacy_threshold = min(max(request.adequacy / 2.0, 0.5), 1.0)  # Normalize to 0.5-1.0
-            fluency_threshold = min(max(request.fluency / 2.0, 0.5), 1.0)    # Normalize to 0.5-1.0
-
-            # Determine diversity ranker based on diversity parameter
-            diversity_ranker = "levenshtein" if request.diversity > 1.0 else "none"
+            # Map frontend parameters to Parrot's parameters once per request
+            settings = _Normalized.from_request(request)
 
-            # For articles, work with shorter chunks - Parrot was trained on max 32 tokens
-            text_to_paraphrase = request.text.strip()
+            # Parrot was trained on short inputs: split the whole text into sentence chunks and
+            # paraphrase them together in batched generate() calls
+            chunks = self._split_chunks(request.text)
 
-            # Take a reasonable chunk for paraphrasing (around 50-100 words)
-            words = text_to_paraphrase.split()
-            if len(words) > 80:
-                text_to_paraphrase = ' '.join(words[:80]) + "..."
+            logger.debug("Paraphrasing %d chunk(s) of %d chars", len(chunks), len(request.text))
+            logger.debug("Parameters: %s", settings)
 
-            # Ensure minimum length
-            if len(text_to_paraphrase) < 20:
-                text_to_paraphrase = text_to_paraphrase[:200]  # Take first 200 chars if too short
+            try:
+                # Concurrent requests are coalesced into shared generate() batches, run off the event loop
+                chunk_candidates = await self._model_batcher.submit((chunks, settings))
 
-            logger.info(f"Paraphrasing chunk of length {len(text_to_paraphrase)} chars")
-            logger.info(f"Parameters: adequacy={adequacy_threshold}, fluency={fluency_threshold}, diversity_ranker={diversity_ranker}")
+                if not any(chunk_candidates):
+                    logger.warning("No paraphrase candidates passed the filters")
+                    return await self._paraphrase_with_fallback(request)
 
-            # Generate paraphrases using Parrot with simpler parameters
-            try:
-                para_phrases = self.parrot.augment(
-                    input_phrase=text_to_paraphrase,
-                    diversity_ranker=diversity_ranker,
-                    do_diverse=request.diversity > 1.0,
-                    max_return_phrases=request.max_variations,
-                    max_length=128,  # Conservative length
-                    adequacy_threshold=adequacy_threshold,
-                    fluency_threshold=fluency_threshold
+                # Variation i uses each chunk's i-th best candidate, keeping the original chunk where
+                # there are fewer candidates
+                for i in range(max(len(candidates) for candidates in chunk_candidates)):
+                    clean_phrase = " ".join(
+                        candidates[i] if i < len(candidates) else chunk
+                        for chunk, candidates in zip(chunks, chunk_candidates)
+                    ).strip()
+                    if len(clean_phrase) > 10:  # Filter out empty or very short results
+                        variations.append(clean_phrase)
+
+                # Calculate confidences based on model parameters and quality, all at once
+                confidence_scores = self._calculate_model_confidences(
+                    request.adequacy, request.fluency, request.diversity, variations
                 )
 
-                # Check if we got valid results
-                if para_phrases and isinstance(para_phrases, list) and len(para_phrases) > 0:
-                    logger.info(f"Successfully generated {len(para_phrases)} paraphrases")
-
-                    for i, phrase in enumerate(para_phrases):
-                        logger.info(f"Processing paraphrase {i}: {type(phrase)} - {phrase}")
-
-                        # Handle different result formats (string or tuple)
-                        if isinstance(phrase, tuple):
-                            # If it's a tuple, take the first element (usually the paraphrase)
-                            logger.info(f"Tuple detected, extracting first element")
-                            phrase = phrase[0] if phrase else ""
-
-                        if phrase and len(str(phrase).strip()) > 10:  # Filter out empty or very short results
-                            clean_phrase = str(phrase).strip()
-                            logger.info(f"Adding variation: {clean_phrase[:100]}...")
-                            variations.append(clean_phrase)
-                            # Calculate confidence based on model parameters and quality
-                            confidence = self._calculate_model_confidence(
-                                request.adequacy, request.fluency, request.diversity, clean_phrase
-                            )
-                            confidence_scores.append(confidence)
-                        else:
-                            logger.warning(f"Skipping phrase due to length or content: {phrase}")
-                else:
-                    logger.warning(f"Invalid or empty paraphrase results: {para_phrases}")
-                    return await self._paraphrase_with_fallback(request)
+                logger.debug("Successfully generated %d paraphrases", len(variations))
 
             except Exception as model_error:
-                logger.error(f"Model-specific error: {str(model_error)}")
+                logger.error("Model-specific error: %s", model_error)
                 return await self._paraphrase_with_fallback(request)
 
         except Exception as e:
-            logger.error(f"Error in model paraphrasing: {str(e)}")
+            logger.error("Error in model paraphrasing: %s", e)
             return await self._paraphrase_with_fallback(request)
 
-        processing_time = time.time() - start_time
-        return variations, confidence_scores, processing_time
+        return variations, confidence_scores
+
+    def _split_chunks(self, text: str) -> List[str]:
+        """
+        Split text into sentence chunks that fit the model input, measured in tokens
+
+        Sentences over the budget are split on clause boundaries, then on words, so the tokenizer
+        never truncates (and silently drops) the end of a long sentence.
+        """
+        sentences = [sentence for sentence in _SENTENCE_SPLIT.split(text.strip()) if sentence]
+        pieces, sizes = self._fit_pieces(sentences, (_CLAUSE_SPLIT.split, str.split))
+        return _pack_sentences(pieces, sizes, _CHUNK_TOKENS)
+
+    def _fit_pieces(self, texts: List[str], splitters: Tuple) -> Tuple[List[str], List[int]]:
+        """Texts and their token counts, splitting any over _CHUNK_TOKENS with the next splitter"""
+        if not texts:
+            return [], []
+
+        pieces = []
+        sizes = []
+        for text, ids in zip(texts, self.tokenizer(texts, add_special_tokens=False)["input_ids"]):
+            if len(ids) <= _CHUNK_TOKENS:
+                pieces.append(text)
+                sizes.append(len(ids))
+            elif splitters:
+                parts = [part for part in splitters[0](text) if part]
+                sub_pieces, sub_sizes = self._fit_pieces(parts, splitters[1:])
+                pieces.extend(sub_pieces)
+                sizes.extend(sub_sizes)
+            else:
+                # A single "word" over the budget (e.g. a long URL): cut it into token windows
+                for start in range(0, len(ids), _CHUNK_TOKENS):
+                    window = ids[start:start + _CHUNK_TOKENS]
+                    pieces.append(self.tokenizer.decode(window))
+                    sizes.append(len(window))
+        return pieces, sizes
+
+    async def _run_model_batch(self, items: List[Tuple[List[str], _Normalized]]) -> List:
+        """AsyncBatcher callback: generate candidates for several requests in a worker thread"""
+        return await asyncio.to_thread(self._generate_candidates, items)
+
+    def _generate_candidates(self, items: List[Tuple[List[str], _Normalized]]) -> List:
+        """
+        Generate and filter the chunk candidates of several requests (blocking)
+
+        Requests sharing generation settings (number of variations, sampling or beam search) are
+        tokenized and generated together; filtering then uses each request's own thresholds.
+
+        Args:
+            items: (chunks, normalized settings) per request
 
-    async def _paraphrase_with_fallback(self, request: ParaphraseRequest) -> Tuple[List[str], List[float], float]:
+        Returns:
+            Per request, the filtered candidates of each chunk (or the exception that request hit)
+        """
+        groups = {}
+        for index, (_, settings) in enumerate(items):
+            groups.setdefault((settings.num_variations, settings.do_diverse), []).append(index)
+
+        generated = [None] * len(items)
+        for (num_variations, do_diverse), indices in groups.items():
+            all_chunks = [chunk for index in indices for chunk in items[index][0]]
+            candidates = self._generate_batch(all_chunks, num_variations, do_diverse)
+
+            offset = 0
+            for index in indices:
+                chunk_count = len(items[index][0])
+                generated[index] = candidates[offset:offset + chunk_count]
+                offset += chunk_count
+
+        results = []
+        for (chunks, settings), candidates in zip(items, generated):
+            try:
+                results.append([
+                    self._filter_candidates(chunk, chunk_candidates, settings)
+                    for chunk, chunk_candidates in zip(chunks, candidates)
+                ])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _generate_batch(self, chunks: List[str], num_variations: int, do_diverse: bool) -> List[List[str]]:
+        """Generate num_variations candidates for every chunk with batched T5 generate() calls"""
+        import torch
+
+        candidates = []
+        for start in range(0, len(chunks), _GENERATE_BATCH_SIZE):
+            batch = ["paraphrase: " + chunk for chunk in chunks[start:start + _GENERATE_BATCH_SIZE]]
+            inputs = self.tokenizer(batch, return_tensors="pt", padding=True, truncation=True,
+                                    max_length=_MAX_LENGTH).to(self.device)
+
+            # Same decoding as Parrot's augment(): diverse beam groups when do_diverse, sampling otherwise
+            with torch.inference_mode():
+                if do_diverse:
+                    num_beams = max(2, num_variations)
+                    outputs = self.model.generate(**inputs, do_sample=False, num_beams=num_beams,
+                                                  num_beam_groups=_beam_groups(num_beams), diversity_penalty=2.0,
+                                                  max_length=_MAX_LENGTH, early_stopping=True,
+                                                  num_return_sequences=num_variations)
+                else:
+                    outputs = self.model.generate(**inputs, do_sample=True, top_k=120, top_p=0.95,
+                                                  max_length=_MAX_LENGTH, num_return_sequences=num_variations)
+
+            decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            candidates.extend(decoded[i:i + num_variations] for i in range(0, len(decoded), num_variations))
+
+        return candidates
+
+    def _filter_candidates(self, chunk: str, candidates: List[str], settings: _Normalized) -> List[str]:
+        """Apply Parrot's adequacy / fluency filters and diversity ranking to one chunk's candidates"""
+        chunk_lower = chunk.lower()
+        # Drop duplicates and candidates that merely repeat the input
+        candidates = [candidate.strip() for candidate in candidates]
+        candidates = list(dict.fromkeys(c for c in candidates if c and c.lower() != chunk_lower))
+        if not candidates:
+            return []
+
+        candidates = self.parrot.adequacy_score.filter(chunk, candidates, settings.adequacy, self.device)
+        if not candidates:
+            return []
+        candidates = self.parrot.fluency_score.filter(candidates, settings.fluency, self.device)
+        if not candidates or settings.diversity_ranker == "none":
+            return list(candidates)
+
+        ranked = self.parrot.diversity_score.rank(chunk, candidates, settings.diversity_ranker)
+        return sorted(ranked, key=ranked.get, reverse=True)
+
+    async def _paraphrase_with_fallback(self, request: ParaphraseRequest) -> Tuple[List[str], List[float]]:
         """Fallback paraphrasing using simple templates"""
         variations = []
-        confidence_scores = []
-        start_time = time.time()
+
+        template_count = len(self.fallback_templates)
 
         # Generate variations based on max_variations
         for i in range(min(request.max_variations, 3)):
@@ -180,34 +509,21 @@ class ParaphrasingService:
             elif i == 1:
                 variation = self._sentence_structure_change(request.text)
             else:
-                template = getattr(self, 'fallback_templates', ["In other words: {text}"])[i % len(getattr(self, 'fallback_templates', ["In other words: {text}"]))]
+                template = self.fallback_templates[i % template_count]
                 variation = template.format(text=request.text)
 
-            # Calculate confidence score based on parameters
-            confidence = self._calculate_confidence(request.adequacy, request.fluency, request.diversity)
-
             variations.append(variation)
-            confidence_scores.append(confidence)
 
-        processing_time = time.time() - start_time
-        return variations, confidence_scores, processing_time
+        # Calculate confidence scores based on parameters
+        confidence_scores = self._calculate_confidences(
+            request.adequacy, request.fluency, request.diversity, len(variations)
+        )
 
-    def _simple_synonym_replacement(self, text: str) -> str:
-        """Simple synonym replacement"""
-        synonyms = {
-            "good": "excellent", "bad": "poor", "big": "large", "small": "tiny",
-            "fast": "quick", "slow": "gradual", "important": "crucial",
-            "helpful": "beneficial", "effective": "efficient", "new": "recent",
-            "old": "previous", "better": "improved", "best": "optimal"
-        }
+        return variations, confidence_scores
 
-        words = text.split()
-        for i, word in enumerate(words):
-            lower_word = word.lower().strip(".,!?")
-            if lower_word in synonyms:
-                words[i] = word.replace(lower_word, synonyms[lower_word])
-
-        return " ".join(words)
+    def _simple_synonym_replacement(self, text: str) -> str:
+        """Simple synonym replacement (one regex pass over the whole text)"""
+        return _SYNONYM_RE.sub(_replace_synonym, text)
 
     def _sentence_structure_change(self, text: str) -> str:
         """Simple sentence structure modification"""
@@ -219,25 +535,25 @@ class ParaphrasingService:
                 return f"The subject involves {parts[1]}."
         return f"Regarding {text}, this is important to note."
 
-    def _calculate_model_confidence(self, adequacy: float, fluency: float, diversity: float, paraphrase: str) -> float:
-        """Calculate confidence score for model output"""
+    def _calculate_model_confidences(self, adequacy: float, fluency: float, diversity: float,
+                                     paraphrases: List[str]) -> List[float]:
+        """Calculate confidence scores for model output, vectorized over all paraphrases"""
         # Base confidence from parameters
         norm_adequacy = min(adequacy / 2.0, 1.0)
         norm_fluency = min(fluency / 2.0, 1.0)
         norm_diversity = min(diversity / 2.0, 1.0)
 
         # Quality assessment based on length and similarity
-        length_score = min(len(paraphrase) / 100, 1.0)  # Prefer reasonable length
+        lengths = np.fromiter(map(len, paraphrases), dtype=np.float64, count=len(paraphrases))
+        length_scores = np.minimum(lengths / 100, 1.0)  # Prefer reasonable length
 
         # Weighted average
-        confidence = (norm_adequacy * 0.4 + norm_fluency * 0.4 + norm_diversity * 0.1 + length_score * 0.1)
+        confidences = (norm_adequacy * 0.4 + norm_fluency * 0.4 + norm_diversity * 0.1) + length_scores * 0.1
 
-        return round(max(0.1, min(1.0, confidence)), 3)
-
-    def _calculate_confidence(self, adequacy: float, fluency: float, diversity: float) -> float:
-        """Calculate confidence score based on parameters"""
-        import random
+        return np.clip(confidences, 0.1, 1.0).round(3).tolist()
 
+    def _calculate_confidences(self, adequacy: float, fluency: float, diversity: float, count: int) -> List[float]:
+        """Calculate count confidence scores based on parameters"""
         # Normalize parameters to 0-1 range (they come in as 0-2)
         norm_adequacy = min(adequacy / 2.0, 1.0)
         norm_fluency = min(fluency / 2.0, 1.0)
@@ -247,9 +563,17 @@ class ParaphrasingService:
         confidence = (norm_adequacy * 0.3 + norm_fluency * 0.5 + norm_diversity * 0.2)
 
         # Add some randomness to simulate model uncertainty
-        confidence += random.uniform(-0.05, 0.05)
+        confidences = confidence + self._np_rng.uniform(-0.05, 0.05, size=count)
+
+        return np.clip(confidences, 0.0, 1.0).round(3).tolist()
+
+# Global service instance, created on first use
+_instance: Optional[ParaphrasingService] = None
 
-        return round(max(0.0, min(1.0, confidence)), 3)
 
-# Global service instance
-paraphrasing_service = ParaphrasingService()
\ No newline at end of file
+def get_service() -> ParaphrasingService:
+    """Shared ParaphrasingService instance"""
+    global _instance
+    if _instance is None:
+        _instance = ParaphrasingService()
+    return _instance
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""Embedding-similarity cache for near-duplicate generation requests"""
+
+import asyncio
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from typing import Dict, Hashable, List, Optional
+
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:  # sentence-transformers and faiss are optional, the cache is disabled without them
+    SEMANTIC_CACHE_AVAILABLE = False
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from several processes are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Returns a stored value when a new request's text embedding is close enough to an earlier one
+
+    Entries are grouped in buckets that must match exactly (e.g. tone and target length); only the
+    free text (topic and keywords) is compared by cosine similarity.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.95,
+                 path: Optional[str] = None):
+        """
+        Args:
+            model_name: Sentence-transformers model used for the embeddings
+            threshold: Minimum cosine similarity for a hit
+            path: File the cache is loaded from at startup and saved to by save()
+        """
+        self.model_name = model_name
+        self.threshold = threshold
+        self.path = path
+
+        self._model = None
+        self._buckets: Dict[Hashable, "faiss.IndexFlatIP"] = {}
+        self._values: Dict[Hashable, List[str]] = {}
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self._load()
+
+    async def get(self, bucket: Hashable, text: str, threshold: Optional[float] = None) -> Optional[str]:
+        """Closest cached value in the bucket, or None below the similarity threshold"""
+        if bucket not in self._buckets:
+            return None
+        return await asyncio.to_thread(self._lookup, bucket, text,
+                                       self.threshold if threshold is None else threshold)
+
+    async def set(self, bucket: Hashable, text: str, value: str):
+        """Store a value under the embedding of text"""
+        await asyncio.to_thread(self._add, bucket, text, value)
+
+    def save(self):
+        """
+        Write every bucket's vectors and values to self.path
+
+        Several workers may share one file: under an exclusive lock, entries another process saved
+        meanwhile are merged in (values already present are kept once), and the result is written to
+        a temporary file that atomically replaces the old one, so readers never see a partial pickle.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = {
+                bucket: (index.reconstruct_n(0, index.ntotal), list(self._values[bucket]))
+                for bucket, index in self._buckets.items()
+            }
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with open(self.path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            for bucket, (vectors, values) in self._read().items():
+                if bucket not in snapshot:
+                    snapshot[bucket] = (vectors, values)
+                    continue
+                own_vectors, own_values = snapshot[bucket]
+                known = set(own_values)
+                new_rows = [i for i, value in enumerate(values) if value not in known]
+                if new_rows:
+                    snapshot[bucket] = (np.concatenate([own_vectors, vectors[new_rows]]),
+                                        own_values + [values[i] for i in new_rows])
+
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".semantic-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump({"model_name": self.model_name, "buckets": snapshot}, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        logger.info("Saved %d semantic cache entries to %s",
+                    sum(len(values) for _, values in snapshot.values()), self.path)
+
+    def _read(self) -> Dict[Hashable, tuple]:
+        """Buckets (vectors, values) stored at self.path, or none if missing or built with another model"""
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        if data.get("model_name") != self.model_name:
+            logger.warning("Ignoring semantic cache at %s built with another model", self.path)
+            return {}
+        return data["buckets"]
+
+    def _load(self):
+        """Rebuild the indexes saved by save()"""
+        for bucket, (vectors, values) in self._read().items():
+            index = faiss.IndexFlatIP(vectors.shape[1])
+            index.add(vectors)
+            self._buckets[bucket] = index
+            self._values[bucket] = values
+
+    def _encode(self, text: str) -> "np.ndarray":
+        """Normalized embedding (inner product == cosine similarity), loading the model on first use"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model.encode([text], normalize_embeddings=True).astype(np.float32)
+
+    def _lookup(self, bucket: Hashable, text: str, threshold: float) -> Optional[str]:
+        vector = self._encode(text)
+        with self._lock:
+            scores, ids = self._buckets[bucket].search(vector, 1)
+            if ids[0][0] < 0 or scores[0][0] < threshold:
+                return None
+            return self._values[bucket][ids[0][0]]
+
+    def _add(self, bucket: Hashable, text: str, value: str):
+        vector = self._encode(text)
+        with self._lock:
+            index = self._buckets.get(bucket)
+            if index is None:
+                index = self._buckets[bucket] = faiss.IndexFlatIP(vector.shape[1])
+                self._values[bucket] = []
+            index.add(vector)
+            self._values[bucket].append(value)
+
+
+_shared_cache: Optional[SemanticCache] = None
+_shared_cache_checked = False
+
+
+def get_shared_cache() -> Optional[SemanticCache]:
+    """
+    Process-wide cache enabled by SEMANTIC_CACHE_ENABLED (and saved to SEMANTIC_CACHE_PATH)
+
+    Returns:
+        The shared cache, or None when it is disabled or its dependencies are missing
+    """
+    global _shared_cache, _shared_cache_checked
+    if not _shared_cache_checked:
+        _shared_cache_checked = True
+        if os.getenv("SEMANTIC_CACHE_ENABLED"):
+            if SEMANTIC_CACHE_AVAILABLE:
+                _shared_cache = SemanticCache(path=os.getenv("SEMANTIC_CACHE_PATH"))
+            else:
+                logger.warning("SEMANTIC_CACHE_ENABLED is set but sentence-transformers / faiss are not installed")
+    return _shared_cache
@@ -1,68 +1,213 @@
+import asyncio
+import os
 import re
 import time
-import random
+import hashlib
 import httpx
+import orjson
+import itertools
+import zlib
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Mapping, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from cachetools import TTLCache
+from services.batcher import AsyncBatcher
+from services.endpoint_pool import Endpoint, EndpointPool
+from services.semantic_cache import get_shared_cache
+
+# "TAG: value" lines of the AI response; [^\S\n] keeps an empty tag from capturing the next line
+_AI_LINE_RE = re.compile(r'^[^\S\n]*(H1|H2|META|SLUG):[^\S\n]*(\S.*?)\s*$', re.MULTILINE)
+_AI_TAGS = frozenset(("H1", "H2", "META", "SLUG"))
+
+# The fixed-shape answer (H1, six H2s, META, SLUG) fits comfortably; the model stops at the END line
+_MAX_TOKENS_PER_TOPIC = 220
+
+# Consecutive failed completions that open the circuit, and for how many seconds
+_CIRCUIT_FAILURE_THRESHOLD = 5
+_CIRCUIT_COOLDOWN = 30
+
+# Concurrent requests are answered in one completion, one "### <number>" block per topic
+_BATCH_PROMPT_HEADER = (
+    "Generate SEO content for each of the following topics. Answer with one block per topic: "
+    "its \"### <number>\" line, followed by the lines in the format above. "
+    "Write END only once, after the last block.\n\n"
+)
+_BATCH_BLOCK_RE = re.compile(r'^[^\S\n]*###[^\S\n]*(\d+)[^\S\n]*$', re.MULTILINE)
+
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
+
+# Headings for reworded topics are interchangeable, so the similarity bar is lower than for articles
+_SEMANTIC_BUCKET = "seo"
+_SEMANTIC_THRESHOLD = 0.88
+
+# All fixed instructions live in the system message so every request shares the same prompt prefix
+# (which the provider can cache); only the topic and keywords follow in the user message.
+# Keep this text free of per-request values.
+_SYS_PROMPT_SEO = """You are an expert SEO specialist who creates optimized content that ranks well on search engines.
+
+For the topic and target keywords given by the user, generate:
+1. ONE compelling H1 heading (under 60 characters, must include main keyword, avoid generic phrases like "How to be" or "What is")
+2. SIX relevant H2 headings covering different aspects (each under 70 characters):
+   - 5 main content sections covering: basics, benefits, strategies, challenges, future trends
+   - 1 conclusion section (use words like "Conclusion", "Summary", "Final Thoughts", "Key Takeaways")
+3. An engaging meta description (155-160 characters, includes main keyword, compelling call-to-action)
+4. A URL-friendly slug (under 60 characters, lowercase, uses hyphens, keyword-rich)
+
+Format your response exactly like this:
+H1: [compelling, benefit-oriented heading here]
+H2: [heading 1 - basics/fundamentals]
+H2: [heading 2 - benefits/advantages]
+H2: [heading 3 - strategies/how-to]
+H2: [heading 4 - challenges/solutions]
+H2: [heading 5 - future/trends]
+H2: [conclusion/summary heading]
+META: [meta description here]
+SLUG: [keyword-rich-slug-here]
+END
+
+Guidelines:
+- Make H1 action-oriented and benefit-focused (e.g., "Master [Topic]: Complete Guide for Success" not "How to be [Topic]")
+- H2 headings should be specific and value-driven
+- Include power words: Ultimate, Complete, Master, Guide, Strategies, Secrets, Proven
+- Make content sound authoritative and comprehensive
+- Meta description must entice clicks while accurately describing content"""
+
+# Invariant parts of every completion request; only the user message and token budget vary
+# (_SYSTEM_MSG is serialized as-is, so it stays a plain dict; never mutate it)
+_SYSTEM_MSG: Dict[str, str] = {"role": "system", "content": _SYS_PROMPT_SEO}
+_BASE_PAYLOAD: Mapping[str, object] = MappingProxyType({
+    "model": "deepseek-ai/deepseek-v3.2-exp",
+    "temperature": 0.7,
+    "stream": True
+})
+# Only a single-topic response may stop at END; a batch response can repeat END after every
+# block, so batches rely on the SLUG-count early close instead
+_SINGLE_TOPIC_STOP = ("\nEND",)
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SEOContent:
-    """Data class for SEO content generation results"""
+    """Data class for SEO content generation results (immutable, instances are shared by the caches)"""
     h1_heading: str
-    h2_headings: List[str]
+    h2_headings: Tuple[str, ...]
     meta_description: str
     slug: str
 
 
+# Templates for fallback generation
+_H1_TEMPLATES: Tuple[str, ...] = (
+    "The Ultimate Guide to {topic}",
+    "Mastering {topic}: Best Practices and Strategies",
+    "{topic}: Everything You Need to Know",
+    "A Comprehensive Guide to {topic}",
+    "Understanding {topic}: Key Insights and Tips"
+)
+
+_H2_TEMPLATES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "basics": (
+        "What is {topic} and Why Does it Matter?",
+        "Understanding the Fundamentals of {topic}",
+        "Getting Started with {topic}"
+    ),
+    "benefits": (
+        "Key Benefits of {topic}",
+        "Why {topic} is Essential for Success",
+        "The Advantages of Implementing {topic}"
+    ),
+    "strategies": (
+        "Effective {topic} Strategies",
+        "Best Practices for {topic}",
+        "How to Implement {topic} Successfully"
+    ),
+    "challenges": (
+        "Common {topic} Challenges and Solutions",
+        "Overcoming Obstacles in {topic}",
+        "Pitfalls to Avoid in {topic}"
+    ),
+    "future": (
+        "The Future of {topic}",
+        "Emerging Trends in {topic}",
+        "What's Next for {topic}"
+    )
+})
+_H2_CATEGORIES = tuple(_H2_TEMPLATES)
+
+_CONCLUSION_TEMPLATES: Tuple[str, ...] = (
+    "Conclusion: Mastering {topic}",
+    "Final Thoughts on {topic}",
+    "Key Takeaways for {topic} Success",
+    "Summary: {topic} Best Practices"
+)
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut text to limit characters, ending in an ellipsis when shortened"""
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+@lru_cache(maxsize=512)
+def _format_templates(topic: str) -> Tuple[Tuple[str, ...], Mapping[str, Tuple[str, ...]], Tuple[str, ...]]:
+    """
+    Fallback headings for a topic, formatted and length-trimmed once per topic
+
+    Returns:
+        H1 options, H2 options per category and conclusion H2 options
+    """
+    h1_options = tuple(_truncate(template.format(topic=topic), 60) for template in _H1_TEMPLATES)
+    h2_options = MappingProxyType({
+        category: tuple(_truncate(template.format(topic=topic), 70) for template in templates)
+        for category, templates in _H2_TEMPLATES.items()
+    })
+    conclusion_options = tuple(template.format(topic=topic) for template in _CONCLUSION_TEMPLATES)
+    return h1_options, h2_options, conclusion_options
+
+
+@lru_cache(maxsize=4096)
+def _generate_slug(topic: str) -> str:
+    """Generate URL-friendly slug from topic (cached, topics recur across requests)"""
+    # Lowercase, drop special chars, collapse spaces/hyphens and trim leading/trailing hyphens
+    slug = _SLUG_DASH_RE.sub('-', _SLUG_STRIP_RE.sub('', topic.lower())).strip('-')
+
+    # Limit length, dropping a partial trailing word (a single overlong word is cut hard)
+    if len(slug) > 60:
+        slug = slug[:60].rsplit('-', 1)[0]
+
+    return slug if slug else "untitled"
+
+
 class SEOContentGenerator:
     """Service for generating SEO-optimized content like headings, meta descriptions, and slugs"""
 
     def __init__(self):
         self.api_url = "https://nano-gpt.com/api/v1/chat/completions"
-        self.api_key = None
-
-        # Templates for fallback generation
-        self.h1_templates = [
-            "The Ultimate Guide to {topic}",
-            "Mastering {topic}: Best Practices and Strategies",
-            "{topic}: Everything You Need to Know",
-            "A Comprehensive Guide to {topic}",
-            "Understanding {topic}: Key Insights and Tips"
-        ]
+        # Read once at startup (main.py loads .env before importing the services)
+        self.api_key = os.getenv("NANO_GPT_API_KEY")
+        # Same endpoint/key pairs as the article generator (NANO_GPT_ENDPOINTS_JSON)
+        self.endpoints = EndpointPool.from_env(self.api_url, self.api_key)
+        if not self.endpoints:
+            logger.warning("NANO_GPT_API_KEY not found in environment variables, SEO content will use templates")
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
 
-        self.h2_templates = {
-            "basics": [
-                "What is {topic} and Why Does it Matter?",
-                "Understanding the Fundamentals of {topic}",
-                "Getting Started with {topic}"
-            ],
-            "benefits": [
-                "Key Benefits of {topic}",
-                "Why {topic} is Essential for Success",
-                "The Advantages of Implementing {topic}"
-            ],
-            "strategies": [
-                "Effective {topic} Strategies",
-                "Best Practices for {topic}",
-                "How to Implement {topic} Successfully"
-            ],
-            "challenges": [
-                "Common {topic} Challenges and Solutions",
-                "Overcoming Obstacles in {topic}",
-                "Pitfalls to Avoid in {topic}"
-            ],
-            "future": [
-                "The Future of {topic}",
-                "Emerging Trends in {topic}",
-                "What's Next for {topic}"
-            ]
-        }
+        # AI results for identical (topic, keywords) requests, kept for an hour
+        self._response_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+
+        # Circuit breaker: after repeated failures skip the API (and its timeouts) for a while
+        self._consecutive_failures = 0
+        self._circuit_open_until = 0.0
+
+        # Rotates the fallback templates between calls for the same topic
+        self._template_calls = itertools.count()
+
+        self._ai_batcher = AsyncBatcher(self._generate_batch_with_ai, max_batch_size=8, max_wait_ms=50)
+
+        # Opt-in similarity cache shared with the article generator (SEMANTIC_CACHE_ENABLED)
+        self.semantic_cache = get_shared_cache()
 
     async def generate_seo_content(self, topic: str, keywords: List[str] = None) -> SEOContent:
         """
@@ -77,116 +222,224 @@ class SEOContentGenerator:
         """
         start_time = time.time()
 
+        key = self._cache_key(topic, keywords)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            logger.info("SEO content cache hit for topic: %s", topic)
+            return cached
+
+        semantic_text = f"{topic} | {', '.join(sorted(keywords or []))}".strip().lower()
+        if self.semantic_cache is not None:
+            similar = await self.semantic_cache.get(_SEMANTIC_BUCKET, semantic_text, _SEMANTIC_THRESHOLD)
+            if similar is not None:
+                logger.info("SEO content semantic cache hit for topic: %s", topic)
+                fields = orjson.loads(similar)
+                fields["h2_headings"] = tuple(fields["h2_headings"])
+                seo_content = SEOContent(**fields)
+                self._response_cache[key] = seo_content
+                return seo_content
+
         try:
             # Try AI generation first
-            logger.info(f"Attempting AI SEO content generation for topic: {topic}")
+            logger.info("Attempting AI SEO content generation for topic: %s", topic)
             seo_content = await self._generate_with_ai(topic, keywords)
         except Exception as e:
-            logger.warning(f"AI SEO generation failed: {e}, using templates")
+            logger.warning("AI SEO generation failed: %s, using templates", e)
             seo_content = self._generate_with_templates(topic, keywords)
+        else:
+            # Only AI results are cached; template results rotate per call
+            self._response_cache[key] = seo_content
+            if self.semantic_cache is not None:
+                await self.semantic_cache.set(_SEMANTIC_BUCKET, semantic_text, orjson.dumps(seo_content).decode())
 
         generation_time = time.time() - start_time
-        logger.info(f"SEO content generated in {generation_time:.2f}s")
+        logger.info("SEO content generated in %.2fs", generation_time)
 
         return seo_content
 
     async def _generate_with_ai(self, topic: str, keywords: List[str] = None) -> SEOContent:
-        """Generate SEO content using AI"""
-        import os
-        self.api_key = os.getenv("NANO_GPT_API_KEY")
-
-        if not self.api_key:
-            logger.error("NANO_GPT_API_KEY not found in environment variables")
+        """Generate SEO content using AI (concurrent requests share one completion)"""
+        if not self.endpoints:
             raise Exception("NANO_GPT_API_KEY not found in environment variables")
+        if time.monotonic() < self._circuit_open_until:
+            raise Exception("Nano-GPT circuit open after repeated failures")
+        return await self._ai_batcher.submit((topic, keywords))
 
-        keywords_str = ", ".join(keywords) if keywords else topic
+    async def _generate_batch_with_ai(self, items: List[Tuple[str, List[str]]]) -> List:
+        """
+        Generate SEO content for one or more topics with a single completion
 
-        prompt = f"""Generate SEO-optimized content for the topic: "{topic}"
+        Args:
+            items: (topic, keywords) pairs
 
-Target keywords: {keywords_str}
+        Returns:
+            One SEOContent per item, or an exception for a topic missing from the response
+        """
+        if len(items) == 1:
+            prompt = self._topic_prompt(*items[0])
+        else:
+            logger.debug("Generating SEO content for %d topics in one request", len(items))
+            prompt = _BATCH_PROMPT_HEADER + "\n\n".join(
+                f"### {number}\n{self._topic_prompt(topic, keywords)}"
+                for number, (topic, keywords) in enumerate(items, 1)
+            )
 
-Please generate:
-1. ONE compelling H1 heading (under 60 characters, must include main keyword, avoid generic phrases like "How to be" or "What is")
-2. SIX relevant H2 headings covering different aspects (each under 70 characters):
-   - 5 main content sections covering: basics, benefits, strategies, challenges, future trends
-   - 1 conclusion section (use words like "Conclusion", "Summary", "Final Thoughts", "Key Takeaways")
-3. An engaging meta description (155-160 characters, includes main keyword, compelling call-to-action)
-4. A URL-friendly slug (under 60 characters, lowercase, uses hyphens, keyword-rich)
+        payload = {
+            **_BASE_PAYLOAD,
+            "messages": [_SYSTEM_MSG, {"role": "user", "content": prompt}],
+            "max_tokens": _MAX_TOKENS_PER_TOPIC * len(items)
+        }
+        if len(items) == 1:
+            payload["stop"] = _SINGLE_TOPIC_STOP
 
-Format your response exactly like this:
-H1: [compelling, benefit-oriented heading here]
-H2: [heading 1 - basics/fundamentals]
-H2: [heading 2 - benefits/advantages]
-H2: [heading 3 - strategies/how-to]
-H2: [heading 4 - challenges/solutions]
-H2: [heading 5 - future/trends]
-H2: [conclusion/summary heading]
-META: [meta description here]
-SLUG: [keyword-rich-slug-here]
+        try:
+            content = await self._complete(payload, len(items))
+        except Exception:
+            self._record_failure()
+            raise
+        if len(items) == 1:
+            self._consecutive_failures = 0
+            return [self._parse_ai_response(content, items[0][0])]
+
+        parts = _BATCH_BLOCK_RE.split(content)
+        blocks = {int(number): block for number, block in zip(parts[1::2], parts[2::2])}
+        missing = len(items) - sum(number in blocks for number in range(1, len(items) + 1))
+        if missing:
+            # A truncated or malformed batch counts against the circuit like a failed request
+            logger.warning("SEO batch response is missing %d of %d topics", missing, len(items))
+            self._record_failure()
+        else:
+            self._consecutive_failures = 0
+        return [
+            self._parse_ai_response(blocks[number], topic) if number in blocks
+            else Exception(f"No SEO content returned for topic: {topic}")
+            for number, (topic, _) in enumerate(items, 1)
+        ]
 
-Guidelines:
-- Make H1 action-oriented and benefit-focused (e.g., "Master {topic}: Complete Guide for Success" not "How to be {topic}")
-- H2 headings should be specific and value-driven
-- Include power words: Ultimate, Complete, Master, Guide, Strategies, Secrets, Proven
-- Make content sound authoritative and comprehensive
-- Meta description must entice clicks while accurately describing content"""
+    def _record_failure(self):
+        """Count a failed completion; enough in a row open the circuit for a cool-down period"""
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= _CIRCUIT_FAILURE_THRESHOLD:
+            self._consecutive_failures = 0
+            self._circuit_open_until = time.monotonic() + _CIRCUIT_COOLDOWN
+            logger.warning("Nano-GPT failed %d times in a row, using templates for %ds",
+                           _CIRCUIT_FAILURE_THRESHOLD, _CIRCUIT_COOLDOWN)
+
+    @staticmethod
+    def _topic_prompt(topic: str, keywords: List[str] = None) -> str:
+        """User prompt lines for one topic"""
+        keywords_str = ", ".join(keywords) if keywords else topic
+        return f'Topic: "{topic}"\nTarget keywords: {keywords_str}'
+
+    async def _complete(self, payload: Dict, topic_count: int = 1) -> str:
+        """Run a completion on the least busy endpoint, failing over to the others"""
+        tried = []
+        while True:
+            endpoint = self.endpoints.pick(exclude=tried)
+            try:
+                async with endpoint.slot():
+                    return await self._stream_completion(endpoint, payload, topic_count)
+            except Exception as e:
+                tried.append(endpoint)
+                if len(tried) == len(self.endpoints):
+                    raise
+                logger.warning("Endpoint %s failed (%s), failing over", endpoint.url, e)
+
+    async def _stream_completion(self, endpoint: Endpoint, payload: Dict, topic_count: int = 1) -> str:
+        """
+        Stream a chat completion (SSE) and return the accumulated message content
 
-        payload = {
-            "model": "deepseek-ai/deepseek-v3.2-exp",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are an expert SEO specialist who creates optimized content that ranks well on search engines."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.7,
-            "max_tokens": 500,
-            "stream": False
-        }
+        The stream is closed as soon as every requested field (H1, H2, META, SLUG) has a complete
+        line for every topic, so trailing tokens are neither waited for nor billed.
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+        Args:
+            endpoint: Endpoint (URL and auth headers) to send it to
+            payload: Chat completion payload with "stream" enabled
+            topic_count: Number of topics (SLUG lines) the response must cover
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(self.api_url, json=payload, headers=headers)
+        Returns:
+            The generated content
+        """
+        parts = []
+        client = self._get_client()
 
+        async with client.stream("POST", endpoint.url, content=orjson.dumps(payload),
+                                 headers=endpoint.headers) as response:
             if response.status_code != 200:
-                raise Exception(f"API request failed: {response.status_code} - {response.text}")
-
-            data = response.json()
-            if "choices" not in data or len(data["choices"]) == 0:
-                raise Exception("Invalid API response format")
+                body = (await response.aread()).decode(errors="replace")
+                raise Exception(f"API request failed: {response.status_code} - {body}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
 
-            content = data["choices"][0]["message"]["content"]
-            return self._parse_ai_response(content, topic)
+                choices = orjson.loads(data).get("choices")
+                if not choices:
+                    continue
+                delta = (choices[0].get("delta") or {}).get("content")
+                if not delta:
+                    continue
+
+                parts.append(delta)
+
+                # Only re-check when a line has been completed
+                if "\n" in delta:
+                    content = "".join(parts)
+                    complete = content[:content.rfind("\n")]
+                    tags = [m.group(1) for m in _AI_LINE_RE.finditer(complete)]
+                    if tags.count("SLUG") >= topic_count and _AI_TAGS.issubset(tags):
+                        logger.debug("All SEO fields received, closing stream early")
+                        break
+
+        if not parts:
+            raise Exception("Invalid API response format")
+
+        return "".join(parts)
+
+    @staticmethod
+    def _cache_key(topic: str, keywords: List[str] = None) -> str:
+        """Stable key for a topic and its (order-insensitive) keywords"""
+        return hashlib.sha256(f"{topic}|{','.join(sorted(keywords or []))}".encode()).hexdigest()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared HTTP/2 client for the running event loop, so connections are kept alive across requests"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client_loop = loop
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                headers={"Accept-Encoding": "gzip"}
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared client (called on application shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def _parse_ai_response(self, content: str, topic: str) -> SEOContent:
         """Parse AI response to extract SEO components"""
-        lines = content.strip().split('\n')
-
         h1_heading = ""
         h2_headings = []
         meta_description = ""
         slug = ""
 
-        for line in lines:
-            line = line.strip()
-            if line.startswith('H1:'):
-                h1_heading = line.replace('H1:', '').strip()
-            elif line.startswith('H2:'):
-                h2_heading = line.replace('H2:', '').strip()
-                if h2_heading:
-                    h2_headings.append(h2_heading)
-            elif line.startswith('META:'):
-                meta_description = line.replace('META:', '').strip()
-            elif line.startswith('SLUG:'):
-                slug = line.replace('SLUG:', '').strip()
+        for match in _AI_LINE_RE.finditer(content):
+            tag, value = match.group(1), match.group(2)
+            if tag == 'H2':
+                h2_headings.append(value)
+            elif tag == 'H1':
+                h1_heading = value
+            elif tag == 'META':
+                meta_description = value
+            else:
+                slug = value
 
         # Validate and fallback if needed
         if not h1_heading:
@@ -196,58 +449,51 @@ Guidelines:
         if not meta_description:
             meta_description = f"Learn everything about {topic}. Discover best practices, strategies, and expert insights to succeed."
         if not slug:
-            slug = self._generate_slug(topic)
+            slug = _generate_slug(topic)
 
         # Ensure we have exactly 6 H2 headings
         h2_headings = h2_headings[:6]
 
         return SEOContent(
             h1_heading=h1_heading,
-            h2_headings=h2_headings,
+            h2_headings=tuple(h2_headings),
             meta_description=meta_description,
             slug=slug
         )
 
     def _generate_with_templates(self, topic: str, keywords: List[str] = None) -> SEOContent:
         """Generate SEO content using templates"""
+        h1_options, h2_options, conclusion_options = _format_templates(topic)
+
+        # Templates rotate with a per-topic offset plus a call counter instead of random picks
+        index = zlib.crc32(topic.encode()) + next(self._template_calls)
+
         # Generate H1
-        h1_heading = random.choice(self.h1_templates).format(topic=topic)
-        if len(h1_heading) > 60:
-            h1_heading = h1_heading[:57] + "..."
+        h1_heading = h1_options[index % len(h1_options)]
 
         # Generate H2 headings
-        h2_headings = []
-        categories = list(self.h2_templates.keys())
-        selected_categories = random.sample(categories, min(5, len(categories)))
-
-        for category in selected_categories:
-            template = random.choice(self.h2_templates[category])
-            h2 = template.format(topic=topic)
-            if len(h2) > 70:
-                h2 = h2[:67] + "..."
-            h2_headings.append(h2)
+        category_count = len(_H2_CATEGORIES)
+        selected_categories = [_H2_CATEGORIES[(index + i) % category_count] for i in range(min(5, category_count))]
+        h2_headings = [
+            h2_options[category][(index + i) % len(h2_options[category])]
+            for i, category in enumerate(selected_categories)
+        ]
 
         # Add conclusion
-        conclusion_templates = [
-            f"Conclusion: Mastering {topic}",
-            f"Final Thoughts on {topic}",
-            f"Key Takeaways for {topic} Success",
-            f"Summary: {topic} Best Practices"
-        ]
-        h2_headings.append(random.choice(conclusion_templates))
+        h2_headings.append(conclusion_options[index % len(conclusion_options)])
 
         # Ensure exactly 6 headings
         h2_headings = h2_headings[:6]
 
         # Generate meta description
-        meta_description = self._generate_meta_description_template(topic, keywords)
+        meta_description = self._generate_meta_description_template(topic, keywords, index)
 
         # Generate slug
-        slug = self._generate_slug(topic)
+        slug = _generate_slug(topic)
 
         return SEOContent(
             h1_heading=h1_heading,
-            h2_headings=h2_headings,
+            h2_headings=tuple(h2_headings),
             meta_description=meta_description,
             slug=slug
         )
@@ -265,7 +511,7 @@ Guidelines:
         needed = 6 - existing_count
         return fallbacks[:needed]
 
-    def _generate_meta_description_template(self, topic: str, keywords: List[str] = None) -> str:
+    def _generate_meta_description_template(self, topic: str, keywords: List[str] = None, index: int = 0) -> str:
         """Generate meta description using templates"""
         templates = [
             f"Discover comprehensive insights about {topic}. Learn best practices, strategies, and expert tips to achieve success.",
@@ -274,7 +520,7 @@ Guidelines:
             f"Learn about {topic} and its key benefits. Get professional insights and strategies to implement effectively."
         ]
 
-        meta_desc = random.choice(templates)
+        meta_desc = templates[index % len(templates)]
         if len(meta_desc) > 160:
             meta_desc = meta_desc[:157] + "..."
         elif len(meta_desc) < 140:
@@ -284,30 +530,6 @@ Guidelines:
 
         return meta_desc
 
-    def _generate_slug(self, topic: str) -> str:
-        """Generate URL-friendly slug from topic"""
-        # Convert to lowercase and replace spaces/special chars with hyphens
-        slug = re.sub(r'[^\w\s-]', '', topic.lower())
-        slug = re.sub(r'[-\s]+', '-', slug)
-
-        # Remove leading/trailing hyphens
-        slug = slug.strip('-')
-
-        # Limit length
-        if len(slug) > 60:
-            words = slug.split('-')
-            result = []
-            current_length = 0
-            for word in words:
-                if current_length + len(word) + 1 <= 60:
-                    result.append(word)
-                    current_length += len(word) + 1
-                else:
-                    break
-            slug = '-'.join(result)
-
-        return slug if slug else "untitled"
-
 
 # Global service instance
 seo_content_generator = SEOContentGenerator()
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The app imports its packages relative to backend/app (e.g. "from services.x import ...")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+# Keep the article disk cache out of /var/cache and never load the semantic cache
+os.environ.setdefault("ARTICLE_CACHE_DIR", tempfile.mkdtemp(prefix="articlegen-test-"))
+os.environ.pop("SEMANTIC_CACHE_ENABLED", None)
@@ -0,0 +1,229 @@
+import asyncio
+import random
+import re
+
+import httpx
+import orjson
+import pytest
+from tenacity import wait_none
+
+from models.article import ArticleGenerationRequest
+from services import article_generator
+from services.article_generator import (
+    ArticleGeneratorService, NanoGPTAPIError, TokenizedArticle, _batch_key, _get_http_client, _is_retryable,
+    _keyword_density, _kw_regex, calculate_keyword_density
+)
+from services.endpoint_pool import Endpoint, EndpointPool
+
+
+def test_batch_key_covers_tone_and_length():
+    base = ArticleGenerationRequest(topic="Content marketing", keywords=["seo", "blog"])
+    assert _batch_key(base) == _batch_key(base.model_copy(update={"keywords": ["blog", "seo"]}))
+    assert _batch_key(base) != _batch_key(base.model_copy(update={"tone": "casual"}))
+    assert _batch_key(base) != _batch_key(base.model_copy(update={"target_length": 800}))
+
+
+def test_batch_does_not_checkpoint_template_fallbacks(tmp_path):
+    service = ArticleGeneratorService()
+    output = tmp_path / "articles.jsonl"
+    requests = [ArticleGenerationRequest(topic="Content marketing"),
+                ArticleGenerationRequest(topic="Email marketing")]
+
+    async def generate_article(request):
+        article = TokenizedArticle(f"An article about {request.topic}.",
+                                   from_templates=request.topic.startswith("Email"))
+        return article.text, {"template_fallback": article.from_templates}, 0.0
+
+    service.generate_article = generate_article
+    generated, _ = asyncio.run(service.generate_articles_batch(requests, str(output)))
+
+    records = [orjson.loads(line) for line in output.read_text().splitlines()]
+    assert generated == 1
+    assert [record["topic"] for record in records] == ["Content marketing"]
+    assert records[0]["key"] == _batch_key(requests[0])
+
+
+def _readability_baseline(text):
+    """_calculate_readability_score with the original per-word character count"""
+    words = text.split()
+    if not words:
+        return 0.0
+    sentence_count = max(1, text.count('.') + text.count('!') + text.count('?'))
+    avg_words_per_sentence = len(words) / sentence_count
+    avg_chars_per_word = sum(len(word) for word in words) / len(words)
+    return round(max(0.0, min(100.0, 100 - 1.5 * avg_words_per_sentence - 2 * avg_chars_per_word)), 1)
+
+
+def test_readability_matches_baseline_with_unicode_whitespace():
+    service = ArticleGeneratorService()
+    rng = random.Random(0)
+    alphabet = "abcdé .!?\t\n  　"
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        assert service._calculate_readability_score(text) == _readability_baseline(text)
+        assert service._calculate_readability_score(text, text.split()) == _readability_baseline(text)
+
+
+def test_http_client_is_recreated_for_a_new_event_loop():
+    async def client():
+        return _get_http_client()
+
+    first = asyncio.run(client())
+    second = asyncio.run(client())
+    assert first is not second
+
+
+def _density_baseline(text, keywords, word_count):
+    """The original case-insensitive regex count per keyword"""
+    return {
+        keyword: round(len(re.findall(re.escape(keyword), text, re.IGNORECASE)) / word_count * 100, 2)
+        if word_count > 0 else 0
+        for keyword in keywords
+    }
+
+
+# No word contains another, so whole-token and substring counts agree for single words
+_VOCABULARY = ["Seo", "content", "BLOG", "writing", "Güzel", "çiçek", "data", "ÖZEL"]
+
+
+def _random_text(rng):
+    words = rng.choices(_VOCABULARY, k=rng.randint(0, 60))
+    return "".join(word + rng.choice([" ", "  ", ". ", ", ", "\n"]) for word in words)
+
+
+def test_keyword_density_paths_match_baseline():
+    rng = random.Random(0)
+    for _ in range(500):
+        text = _random_text(rng)
+        word_count = len(text.split())
+        keywords = [
+            # Single tokens (Counter path), ASCII phrases (str.count path), non-ASCII phrases (regex path)
+            rng.choice(_VOCABULARY).lower(),
+            " ".join(rng.sample(["seo", "Content", "blog"], 2)),
+            " ".join(rng.sample(["güzel", "Çiçek", "özel"], 2)),
+        ]
+        assert calculate_keyword_density(text, keywords, word_count) == \
+            _density_baseline(text, keywords, word_count)
+
+
+def test_keyword_density_single_words_agree_across_paths():
+    rng = random.Random(1)
+    for _ in range(500):
+        text_lower = _random_text(rng).lower()
+        for keyword in {word.lower() for word in _VOCABULARY}:
+            # With 100 words the density is the raw count
+            token_count = _keyword_density(text_lower, 100, [keyword])[keyword]
+            assert token_count == text_lower.count(keyword) == len(_kw_regex(keyword).findall(text_lower))
+
+
+def test_single_word_keywords_match_whole_tokens():
+    density = calculate_keyword_density("Marketing and market research", ["market"], 4)
+    assert density == {"market": 25.0}
+
+
+def _condense_baseline(sentences, words_to_remove):
+    """The original condense loop: repeatedly drop the shortest sentence, keeping at least 5"""
+    kept = list(enumerate(sentences))
+    while words_to_remove > 0 and len(kept) > 5:
+        kept.sort(key=lambda item: len(item[1]))
+        _, removed = kept.pop(0)
+        words_to_remove -= len(removed.split())
+        kept.sort()
+    return [sentence for _, sentence in kept]
+
+
+def _random_sentences(rng, count):
+    return [" ".join(rng.choices(_VOCABULARY, k=rng.randint(1, 12))).capitalize() + rng.choice(".!?")
+            for _ in range(count)]
+
+
+def test_condense_matches_baseline():
+    service = ArticleGeneratorService()
+    rng = random.Random(2)
+    for _ in range(300):
+        sentences = _random_sentences(rng, rng.randint(0, 25))
+        words_to_remove = rng.randint(0, 150)
+        condensed = service._condense_article(TokenizedArticle(" ".join(sentences)), words_to_remove)
+        assert condensed.sentences == _condense_baseline(sentences, words_to_remove)
+
+
+def test_expand_keeps_originals_in_order_after_the_opening_sentence():
+    service = ArticleGeneratorService()
+    rng = random.Random(3)
+    for _ in range(300):
+        sentences = _random_sentences(rng, rng.randint(0, 20))
+        additional_words = rng.randint(0, 120)
+        expanded = service._expand_article(TokenizedArticle(" ".join(sentences)), additional_words,
+                                           random.Random(rng.random())).sentences
+
+        added = len(expanded) - len(sentences)
+        assert len(expanded) <= max(20, len(sentences))
+        assert [s for s in expanded if s in sentences] == sentences
+        if sentences:
+            assert expanded[0] == sentences[0]
+        if added:
+            added_words = sum(len(s.split()) for s in expanded if s not in sentences)
+            # Stops once enough words were added, or at the 20 sentence cap
+            assert added_words >= additional_words or len(expanded) == 20
+            assert added_words - additional_words < 10
+
+
+def test_expand_is_reproducible_with_a_seeded_rng():
+    service = ArticleGeneratorService()
+    article = TokenizedArticle("First sentence here. Second one follows. Third closes it.")
+    first = service._expand_article(article, 40, random.Random(42))
+    second = service._expand_article(article, 40, random.Random(42))
+    assert first.text == second.text
+
+
+@pytest.mark.parametrize("exc, retryable", [
+    (NanoGPTAPIError(429, "slow down"), True),
+    (NanoGPTAPIError(500, ""), True),
+    (NanoGPTAPIError(503, ""), True),
+    (NanoGPTAPIError(400, "bad request"), False),
+    (NanoGPTAPIError(401, "bad key"), False),
+    (httpx.ConnectError("refused"), True),
+    (httpx.ReadTimeout("timed out"), True),
+    (ValueError("bad json"), False),
+])
+def test_is_retryable(exc, retryable):
+    assert _is_retryable(exc) is retryable
+
+
+def _service_with_endpoints(monkeypatch, statuses):
+    """Service whose endpoints answer with the given status (200 streams one word)"""
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        status = statuses[request.url.host]
+        if status != 200:
+            return httpx.Response(status, text="error")
+        return httpx.Response(200, text='data: {"choices": [{"delta": {"content": "Hello"}}]}\n\n')
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(article_generator, "_get_http_client", lambda: client)
+    monkeypatch.setattr(ArticleGeneratorService._stream_completion.retry, "wait", wait_none())
+
+    service = ArticleGeneratorService()
+    service.endpoints = EndpointPool([Endpoint(f"https://{host}/v1", "key") for host in statuses])
+    # Make the first endpoint the least busy, so it is picked first
+    for endpoint in service.endpoints.endpoints[1:]:
+        endpoint.inflight = 1
+    return service, hosts
+
+
+def test_complete_fails_over_after_retryable_errors(monkeypatch):
+    service, hosts = _service_with_endpoints(monkeypatch, {"down.test": 503, "up.test": 200})
+
+    assert asyncio.run(service._complete({"stream": True})) == "Hello"
+    # Each endpoint exhausts its own retries before the request moves on
+    assert hosts == ["down.test"] * 4 + ["up.test"]
+
+
+def test_complete_does_not_fail_over_on_client_errors(monkeypatch):
+    service, hosts = _service_with_endpoints(monkeypatch, {"bad.test": 401, "up.test": 200})
+
+    with pytest.raises(NanoGPTAPIError):
+        asyncio.run(service._complete({"stream": True}))
+    assert hosts == ["bad.test"]
@@ -0,0 +1,62 @@
+import asyncio
+
+from services.batcher import AsyncBatcher
+
+
+def _recording_batcher(max_batch_size, max_wait_ms):
+    batches = []
+
+    async def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    return AsyncBatcher(process, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms), batches
+
+
+def test_flushes_when_batch_is_full():
+    # A wait far longer than the test: only reaching max_batch_size can dispatch the batch
+    batcher, batches = _recording_batcher(max_batch_size=3, max_wait_ms=60_000)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(6))), 5)
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8, 10]
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_flushes_partial_batch_after_timeout():
+    batcher, batches = _recording_batcher(max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        return results, loop.time() - start
+
+    results, elapsed = asyncio.run(run())
+    assert results == [2, 4]
+    assert batches == [[1, 2]]
+    assert elapsed >= 0.015
+
+
+def test_exception_result_fails_only_that_item():
+    async def process(items):
+        return [ValueError(item) if item == "bad" else item for item in items]
+
+    batcher = AsyncBatcher(process, max_batch_size=2, max_wait_ms=10)
+
+    async def run():
+        return await asyncio.gather(batcher.submit("ok"), batcher.submit("bad"), return_exceptions=True)
+
+    ok, bad = asyncio.run(run())
+    assert ok == "ok"
+    assert isinstance(bad, ValueError)
+
+
+def test_usable_from_a_second_event_loop():
+    batcher, batches = _recording_batcher(max_batch_size=8, max_wait_ms=10)
+
+    # A queue bound to the first loop would leave the second submission waiting forever
+    assert asyncio.run(asyncio.wait_for(batcher.submit(1), 5)) == 2
+    assert asyncio.run(asyncio.wait_for(batcher.submit(2), 5)) == 4
+    assert batches == [[1], [2]]
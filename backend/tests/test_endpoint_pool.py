@@ -0,0 +1,53 @@
+import asyncio
+import random
+
+from services.endpoint_pool import Endpoint, EndpointPool
+
+
+def _pool(count):
+    return EndpointPool([Endpoint(f"https://e{i}.test/v1", f"key{i}") for i in range(count)])
+
+
+def test_pick_prefers_the_less_loaded_of_two():
+    pool = _pool(2)
+    pool.endpoints[0].inflight = 3
+    assert pool.pick() is pool.endpoints[1]
+
+
+def test_pick_never_returns_the_most_loaded_endpoint():
+    pool = _pool(5)
+    pool._rng = random.Random(0)
+    for i, endpoint in enumerate(pool.endpoints):
+        endpoint.inflight = i
+    assert all(pool.pick() is not pool.endpoints[-1] for _ in range(200))
+
+
+def test_pick_skips_excluded_endpoints():
+    pool = _pool(4)
+    for _ in range(100):
+        tried = random.sample(pool.endpoints, 3)
+        assert pool.pick(exclude=tried) not in tried
+
+
+def test_slot_tracks_inflight_requests():
+    endpoint = Endpoint("https://e.test/v1", "key", concurrency=2)
+
+    async def run():
+        async with endpoint.slot():
+            assert endpoint.inflight == 1
+        return endpoint.inflight
+
+    assert asyncio.run(run()) == 0
+
+
+def test_from_env_reads_the_endpoint_list(monkeypatch):
+    monkeypatch.setenv("NANO_GPT_ENDPOINTS_JSON",
+                       '[{"key": "a", "concurrency": 4}, {"url": "https://other.test/v1", "key": "b"}, {"url": "x"}]')
+    pool = EndpointPool.from_env("https://default.test/v1", "ignored")
+    assert [(e.url, e.key, e.concurrency) for e in pool.endpoints] == [
+        ("https://default.test/v1", "a", 4), ("https://other.test/v1", "b", 64)]
+
+
+def test_from_env_without_a_key_is_empty(monkeypatch):
+    monkeypatch.delenv("NANO_GPT_ENDPOINTS_JSON", raising=False)
+    assert len(EndpointPool.from_env("https://default.test/v1", None)) == 0
@@ -0,0 +1,67 @@
+import math
+import random
+
+import pytest
+
+from api.endpoints import _calculate_seo_score
+
+
+def _seo_score_baseline(word_count, keyword_density, readability_score):
+    """The if/elif scoring _calculate_seo_score's interval tables replaced"""
+    score = 0.0
+
+    if 300 <= word_count <= 1000:
+        score += 30
+    elif 200 <= word_count < 300 or 1000 < word_count <= 1500:
+        score += 20
+    else:
+        score += 10
+
+    if keyword_density:
+        avg_density = sum(keyword_density.values()) / len(keyword_density)
+        if 1.0 <= avg_density <= 3.0:
+            score += 40
+        elif 0.5 <= avg_density < 1.0 or 3.0 < avg_density <= 5.0:
+            score += 25
+        else:
+            score += 15
+    else:
+        score += 10
+
+    if 60 <= readability_score <= 80:
+        score += 30
+    elif 40 <= readability_score < 60 or 80 < readability_score <= 90:
+        score += 20
+    else:
+        score += 10
+
+    return round(min(100.0, score), 1)
+
+
+def _around(edge):
+    return [math.nextafter(edge, -math.inf), edge, math.nextafter(edge, math.inf)]
+
+
+@pytest.mark.parametrize("word_count", [0, 199, 200, 299, 300, 1000, 1001, 1500, 1501, 5000])
+def test_word_count_band_edges(word_count):
+    assert _calculate_seo_score(word_count, {}, 70) == _seo_score_baseline(word_count, {}, 70)
+
+
+@pytest.mark.parametrize("density", [x for edge in (0.5, 1.0, 3.0, 5.0) for x in _around(edge)] + [0.0, 9.0])
+def test_density_band_edges(density):
+    assert _calculate_seo_score(500, {"kw": density}, 70) == _seo_score_baseline(500, {"kw": density}, 70)
+
+
+@pytest.mark.parametrize("readability", [x for edge in (40, 60, 80, 90) for x in _around(edge)] + [0.0, 100.0])
+def test_readability_band_edges(readability):
+    assert _calculate_seo_score(500, {}, readability) == _seo_score_baseline(500, {}, readability)
+
+
+def test_matches_baseline_on_random_inputs():
+    rng = random.Random(0)
+    for _ in range(5000):
+        word_count = rng.randint(0, 2000)
+        density = {f"kw{i}": round(rng.uniform(0, 6), rng.choice([1, 2, 6])) for i in range(rng.randint(0, 3))}
+        readability = round(rng.uniform(0, 100), rng.choice([0, 1, 4]))
+        assert _calculate_seo_score(word_count, density, readability) == \
+            _seo_score_baseline(word_count, density, readability)
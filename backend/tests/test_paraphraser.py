@@ -0,0 +1,73 @@
+import random
+
+from services.paraphraser import _CHUNK_TOKENS, ParaphrasingService
+
+
+class _PieceTokenizer:
+    """SentencePiece-like: words split into 4-character pieces, the first one carrying the space"""
+
+    def __call__(self, texts, add_special_tokens=True):
+        return {"input_ids": [self._encode(text) for text in texts]}
+
+    @staticmethod
+    def _encode(text):
+        return [("\u2581" if start == 0 else "") + word[start:start + 4]
+                for word in text.split() for start in range(0, len(word), 4)]
+
+    def decode(self, ids):
+        return "".join(ids).replace("\u2581", " ").strip()
+
+
+def _service():
+    service = ParaphrasingService()
+    service.tokenizer = _PieceTokenizer()
+    return service
+
+
+def _token_count(text):
+    return len(_PieceTokenizer._encode(text))
+
+
+def _random_text(rng):
+    sentences = []
+    for _ in range(rng.randint(1, 12)):
+        words = [rng.choice(["alpha", "beta", "gamma", "delta", "epsilon"]) + rng.choice(["", "", ","])
+                 for _ in range(rng.randint(1, 60))]
+        if rng.random() < 0.1:
+            words.append("x" * rng.randint(1, 12 * _CHUNK_TOKENS))  # a "word" over the budget
+        sentences.append(" ".join(words) + ".")
+    return " ".join(sentences)
+
+
+def test_chunks_fit_the_budget_without_losing_text():
+    service = _service()
+    rng = random.Random(0)
+    for _ in range(300):
+        text = _random_text(rng)
+        chunks = service._split_chunks(text)
+        assert all(_token_count(chunk) <= _CHUNK_TOKENS for chunk in chunks)
+        assert "".join("".join(chunk.split()) for chunk in chunks) == "".join(text.split())
+
+
+def test_short_sentences_are_packed_together():
+    service = _service()
+    assert service._split_chunks("One two. Three four! Five six?") == ["One two. Three four! Five six?"]
+
+
+def test_long_sentence_is_split_on_clauses_first():
+    service = _service()
+    # Five 30-token clauses: four fill one chunk, the fifth starts the next
+    clause = " ".join(["word"] * 30)
+    sentence = ", ".join([clause] * 5) + "."
+
+    chunks = service._split_chunks(sentence)
+    assert len(chunks) == 2
+    assert chunks[0].endswith(",")
+
+
+def test_fit_pieces_cuts_oversized_words_into_token_windows():
+    service = _service()
+    word = "y" * 4 * (2 * _CHUNK_TOKENS + 5)
+    pieces, sizes = service._fit_pieces([word], ())
+    assert sizes == [_CHUNK_TOKENS, _CHUNK_TOKENS, 5]
+    assert "".join(pieces) == word
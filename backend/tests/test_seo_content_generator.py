@@ -0,0 +1,148 @@
+import asyncio
+import random
+import re
+
+import httpx
+import orjson
+
+from services.endpoint_pool import Endpoint, EndpointPool
+from services.seo_content_generator import (
+    SEOContent, SEOContentGenerator, _CIRCUIT_FAILURE_THRESHOLD, _generate_slug
+)
+
+
+def _block(topic):
+    h2 = "".join(f"H2: {topic} part {n}\n" for n in range(1, 7))
+    return f"H1: {topic} Guide\n{h2}META: All about {topic}.\nSLUG: {topic.lower()}\n"
+
+
+def _generator(content, requests=None):
+    """Generator whose client streams `content` back one line per SSE event"""
+    def handler(request):
+        if requests is not None:
+            requests.append(orjson.loads(request.content))
+        events = "".join(
+            f"data: {orjson.dumps({'choices': [{'delta': {'content': line}}]}).decode()}\n\n"
+            for line in content.splitlines(keepends=True)
+        )
+        return httpx.Response(200, text=events + "data: [DONE]\n\n")
+
+    generator = SEOContentGenerator()
+    generator.endpoints = EndpointPool([Endpoint("https://nano-gpt.test/v1/chat/completions", "test-key")])
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    generator._get_client = lambda: client
+    return generator
+
+
+def test_batch_response_is_split_per_topic():
+    topics = ["Alpha", "Beta", "Gamma"]
+    requests = []
+    generator = _generator("".join(f"### {i}\n{_block(t)}" for i, t in enumerate(topics, 1)) + "END\n",
+                           requests)
+
+    results = asyncio.run(generator._generate_batch_with_ai([(t, [t]) for t in topics]))
+
+    assert [r.h1_heading for r in results] == [f"{t} Guide" for t in topics]
+    assert [r.slug for r in results] == ["alpha", "beta", "gamma"]
+    assert all(isinstance(r, SEOContent) for r in results)
+    assert "stop" not in requests[0]
+    assert generator._consecutive_failures == 0
+
+
+def test_batch_response_with_end_after_every_block():
+    topics = ["Alpha", "Beta"]
+    generator = _generator("".join(f"### {i}\n{_block(t)}END\n" for i, t in enumerate(topics, 1)))
+
+    results = asyncio.run(generator._generate_batch_with_ai([(t, [t]) for t in topics]))
+
+    assert [r.h1_heading for r in results] == ["Alpha Guide", "Beta Guide"]
+    assert results[1].h2_headings[:2] == ("Beta part 1", "Beta part 2")
+
+
+def test_single_topic_request_stops_at_end():
+    requests = []
+    generator = _generator(_block("Alpha") + "END\n", requests)
+
+    [result] = asyncio.run(generator._generate_batch_with_ai([("Alpha", ["Alpha"])]))
+
+    assert result.h1_heading == "Alpha Guide"
+    assert requests[0]["stop"] == ["\nEND"]
+
+
+def test_missing_block_fails_only_that_topic_and_counts_as_failure():
+    generator = _generator(f"### 1\n{_block('Alpha')}END\n")
+
+    results = asyncio.run(generator._generate_batch_with_ai([("Alpha", []), ("Beta", [])]))
+
+    assert results[0].h1_heading == "Alpha Guide"
+    assert isinstance(results[1], Exception)
+    assert generator._consecutive_failures == 1
+
+
+def test_circuit_opens_after_repeated_failures():
+    generator = SEOContentGenerator()
+    for _ in range(_CIRCUIT_FAILURE_THRESHOLD - 1):
+        generator._record_failure()
+    assert generator._circuit_open_until == 0
+
+    generator._record_failure()
+    assert generator._circuit_open_until > 0
+    assert generator._consecutive_failures == 0
+
+
+def test_failed_endpoint_fails_over_to_the_next():
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        if request.url.host == "down.test":
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(200, text="data: " + orjson.dumps(
+            {"choices": [{"delta": {"content": _block("Alpha")}}]}).decode() + "\n\n")
+
+    generator = SEOContentGenerator()
+    generator.endpoints = EndpointPool([Endpoint("https://down.test/v1", "a"), Endpoint("https://up.test/v1", "b")])
+    generator.endpoints.endpoints[1].inflight = 1  # make the failing endpoint the first pick
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    generator._get_client = lambda: client
+
+    [result] = asyncio.run(generator._generate_batch_with_ai([("Alpha", [])]))
+
+    assert result.h1_heading == "Alpha Guide"
+    assert hosts == ["down.test", "up.test"]
+
+
+def _normalized_slug(topic):
+    return re.sub(r'[-\s]+', '-', re.sub(r'[^\w\s-]', '', topic.lower())).strip('-')
+
+
+def _slug_baseline(topic):
+    """The original word loop _generate_slug's slice + rsplit replaced"""
+    slug = _normalized_slug(topic)
+    if len(slug) > 60:
+        result = []
+        current_length = 0
+        for word in slug.split('-'):
+            if current_length + len(word) + 1 <= 60:
+                result.append(word)
+                current_length += len(word) + 1
+            else:
+                break
+        slug = '-'.join(result)
+    return slug if slug else "untitled"
+
+
+def test_slug_matches_baseline_word_loop():
+    rng = random.Random(0)
+    words = ["SEO", "content", "marketing", "a", "Güide", "2024", "best-practices", "why?", "--", "x" * 25]
+    for _ in range(5000):
+        topic = rng.choice(["", " ", "  "]).join(rng.choices(words, k=rng.randint(0, 20)))
+        slug = _generate_slug(topic)
+        assert len(slug) <= 60
+        # Only a first word of 60+ characters is cut differently (hard instead of "untitled")
+        if len(_normalized_slug(topic).split("-")[0]) < 60:
+            assert slug == _slug_baseline(topic), topic
+
+
+def test_slug_cuts_an_overlong_first_word_hard():
+    assert _generate_slug("y" * 70 + " guide") == "y" * 60